@@ -1,12 +1,6 @@
 #!/usr/bin/env python3
 """Docker Stack Manager - Main entry point."""
 
-import sys
-from pathlib import Path
-
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent))
-
 
 def main():
     """Main entry point."""
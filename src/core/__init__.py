@@ -1,5 +1,7 @@
 """Core modules for Docker Stack Manager."""
 
+import importlib
+
 from .config_loader import (
     ConfigLoader,
     Settings,
@@ -9,11 +11,43 @@ from .config_loader import (
     LXCDefaults,
     get_config_loader,
 )
-from .ssh_manager import SSHManager, SSHKeyManager, get_ssh_manager, get_ssh_key_manager
-from .docker_manager import DockerManager, get_docker_manager
-from .traefik_manager import TraefikManager, ServiceRoute, get_traefik_manager
-from .proxmox_api import ProxmoxAPI, ProxmoxAPIError, get_proxmox_api
-from .lxc_manager import LXCManager, LXCCreationConfig, LXCCreationResult, get_lxc_manager
+
+# Heavier submodules (fabric/paramiko, requests, cryptography) are imported
+# on first attribute access instead of at package import time.
+_LAZY_ATTRS = {
+    "SSHManager": "ssh_manager",
+    "SSHKeyManager": "ssh_manager",
+    "get_ssh_manager": "ssh_manager",
+    "get_ssh_key_manager": "ssh_manager",
+    "DockerManager": "docker_manager",
+    "get_docker_manager": "docker_manager",
+    "TraefikManager": "traefik_manager",
+    "ServiceRoute": "traefik_manager",
+    "get_traefik_manager": "traefik_manager",
+    "ProxmoxAPI": "proxmox_api",
+    "ProxmoxAPIError": "proxmox_api",
+    "get_proxmox_api": "proxmox_api",
+    "LXCManager": "lxc_manager",
+    "LXCCreationConfig": "lxc_manager",
+    "LXCCreationResult": "lxc_manager",
+    "get_lxc_manager": "lxc_manager",
+}
+
+
+def __getattr__(name: str):
+    """Import lazily exported names on first access (PEP 562)."""
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    """Include lazily exported names in dir()."""
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
+
 
 __all__ = [
     "ConfigLoader",
@@ -1,11 +1,39 @@
 """Configuration loader for settings and VM definitions."""
 
 import ipaddress
+import json
+import os
+import re
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 import yaml
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, PrivateAttr, TypeAdapter, field_validator, model_validator
+
+# Prefer the libyaml C bindings, fall back to the pure-Python implementation
+try:
+    from yaml import CSafeLoader as _YamlLoader, CSafeDumper as _YamlDumper
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader, SafeDumper as _YamlDumper
+
+# Dotted-quad IPv4 without leading zeros (same inputs ipaddress accepts)
+_IPV4_RE = re.compile(
+    r"(?:(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\.){3}(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)",
+    re.ASCII,
+)
+
+
+@lru_cache(maxsize=64)
+def _parse_subnet(subnet: str) -> ipaddress.IPv4Network | ipaddress.IPv6Network:
+    """Parse a subnet once per string (kept off the models so equality is unaffected)."""
+    return ipaddress.ip_network(subnet, strict=False)
+
+
+@lru_cache(maxsize=64)
+def _expand_key_path(ssh_key: str) -> Path:
+    """Expand an SSH key path once per string."""
+    return Path(ssh_key).expanduser() if ssh_key else Path()
 
 
 class TraefikConfig(BaseModel):
@@ -64,6 +92,7 @@ class LXCDefaults(BaseModel):
     start_on_boot: bool = True
     start_after_create: bool = True
     features: str = "nesting=1"  # Enable nesting for Docker support
+    shared_bootstrap_key: bool = False  # Reuse one root key for all new containers until Initialize
 
 
 class InfraNetworkConfig(BaseModel):
@@ -89,7 +118,8 @@ class InfraNetworkConfig(BaseModel):
     @classmethod
     def validate_ip(cls, v):
         """Validate IP address."""
-        if v:
+        if v and not _IPV4_RE.fullmatch(v):
+            # Regex covers plain IPv4, ipaddress handles IPv6 and error messages
             try:
                 ipaddress.ip_address(v)
             except ValueError as e:
@@ -97,8 +127,8 @@ class InfraNetworkConfig(BaseModel):
         return v
 
     def get_network(self) -> ipaddress.IPv4Network:
-        """Get the network object."""
-        return ipaddress.ip_network(self.subnet, strict=False)
+        """Get the network object (parsed once per subnet value)."""
+        return _parse_subnet(self.subnet)
 
     def is_ip_in_subnet(self, ip: str) -> bool:
         """Check if an IP is within the configured subnet."""
@@ -110,16 +140,30 @@ class InfraNetworkConfig(BaseModel):
     def get_available_ips(self, used_ips: list[str]) -> list[str]:
         """Get list of available IPs in the subnet."""
         network = self.get_network()
-        used = set(used_ips)
-        used.add(self.gateway)  # Gateway is always used
+        if network.num_addresses <= 2:
+            # /31 and /32 have no network/broadcast address to skip
+            first, last = int(network.network_address), int(network.broadcast_address)
+        else:
+            first, last = int(network.network_address) + 1, int(network.broadcast_address) - 1
+
+        # Compare as ints so only returned hosts are turned into strings
+        used = set()
+        for ip in [*used_ips, self.gateway]:
+            try:
+                used.add(int(ipaddress.ip_address(ip)))
+            except ValueError:
+                pass
 
+        address_class = type(network.network_address)
         available = []
-        for host in network.hosts():
-            ip = str(host)
-            if ip not in used:
-                available.append(ip)
+        for value in range(first, last + 1):
+            if value in used:
+                continue
+            available.append(str(address_class(value)))
+            if len(available) == 50:  # Return max 50 for UI performance
+                break
 
-        return available[:50]  # Return max 50 for UI performance
+        return available
 
 
 class Settings(BaseModel):
@@ -148,7 +192,8 @@ class VMNetworkConfig(BaseModel):
     @classmethod
     def validate_ip(cls, v):
         """Validate IP address (allow empty)."""
-        if v:
+        if v and not _IPV4_RE.fullmatch(v):
+            # Regex covers plain IPv4, ipaddress handles IPv6 and error messages
             try:
                 ipaddress.ip_address(v)
             except ValueError as e:
@@ -178,10 +223,8 @@ class VMConfig(BaseModel):
 
     @property
     def ssh_key_path(self) -> Path:
-        """Return expanded SSH key path."""
-        if self.ssh_key:
-            return Path(self.ssh_key).expanduser()
-        return Path()
+        """Return expanded SSH key path (expanded once per ssh_key value)."""
+        return _expand_key_path(self.ssh_key)
 
     @property
     def display_ip(self) -> str:
@@ -193,6 +236,31 @@ class VMsConfig(BaseModel):
     """Container for all VM configurations."""
     vms: list[VMConfig] = Field(default_factory=list)
 
+    # Name lookup index, rebuilt after validation, on save and when found stale
+    _name_index: dict[str, int] = PrivateAttr(default_factory=dict)
+
+    @model_validator(mode='after')
+    def _build_indexes(self) -> "VMsConfig":
+        """Populate the lookup index after validation."""
+        self.reindex()
+        return self
+
+    def reindex(self) -> None:
+        """Rebuild the name lookup index from the VM list."""
+        name_index: dict[str, int] = {}
+        for i, vm in enumerate(self.vms):
+            name_index.setdefault(vm.name, i)
+        self._name_index = name_index
+
+    def _index_of(self, name: str) -> Optional[int]:
+        """Get the list position of a VM by name."""
+        i = self._name_index.get(name)
+        if i is None or i >= len(self.vms) or self.vms[i].name != name:
+            # The list may have been modified in place since the last rebuild
+            self.reindex()
+            i = self._name_index.get(name)
+        return i
+
     def get_traefik_vm(self) -> Optional[VMConfig]:
         """Get the Traefik VM configuration."""
         for vm in self.vms:
@@ -206,10 +274,8 @@ class VMsConfig(BaseModel):
 
     def get_vm_by_name(self, name: str) -> Optional[VMConfig]:
         """Get VM by name."""
-        for vm in self.vms:
-            if vm.name == name:
-                return vm
-        return None
+        i = self._index_of(name)
+        return self.vms[i] if i is not None else None
 
     def get_used_ips(self) -> list[str]:
         """Get list of all used IP addresses."""
@@ -227,6 +293,9 @@ class VMsConfig(BaseModel):
 
     def is_ip_used(self, ip: str, exclude_vm: str = None) -> bool:
         """Check if an IP is already used by another VM."""
+        if not ip:
+            return False
+        # Scanned rather than indexed: the list is short and may be changed in place
         for vm in self.vms:
             if exclude_vm and vm.name == exclude_vm:
                 continue
@@ -235,9 +304,19 @@ class VMsConfig(BaseModel):
         return False
 
 
+# Validators/serializers are compiled once and reused for every (re)load
+_SETTINGS_ADAPTER = TypeAdapter(Settings)
+_VMS_ADAPTER = TypeAdapter(VMsConfig)
+_BOOL_ADAPTER = TypeAdapter(bool)
+
+
 class ConfigLoader:
     """Loads and manages configuration files."""
 
+    # Files mirrored to JSON for fast reloads. settings.yaml is small and holds
+    # secrets (Proxmox token etc.), so it is never copied.
+    _JSON_MIRRORED = frozenset({"vms.yaml"})
+
     def __init__(self, config_dir: Optional[Path] = None):
         """Initialize config loader with config directory."""
         if config_dir is None:
@@ -257,14 +336,92 @@ class ConfigLoader:
         if not filepath.exists():
             return {}
 
+        if filename in self._JSON_MIRRORED:
+            cached = self._load_json_cache(filepath)
+            if cached is not None:
+                return cached
+
         with open(filepath) as f:
-            return yaml.safe_load(f) or {}
+            return yaml.load(f, Loader=_YamlLoader) or {}
 
     def _save_yaml(self, filename: str, data: dict) -> None:
         """Save data to a YAML file in the config directory."""
         filepath = self.config_dir / filename
         with open(filepath, 'w') as f:
-            yaml.dump(data, f, default_flow_style=False, allow_unicode=True)
+            yaml.dump(data, f, Dumper=_YamlDumper, default_flow_style=False, allow_unicode=True)
+        if filename in self._JSON_MIRRORED:
+            self._save_json_cache(filepath, data)
+        else:
+            # Drop a mirror left behind by versions that cached every file
+            self._json_cache_path(filepath).unlink(missing_ok=True)
+
+    def _json_cache_path(self, filepath: Path) -> Path:
+        """Get the JSON mirror path for a YAML config file."""
+        return filepath.with_name(f"{filepath.name}.cache.json")
+
+    def _load_json_cache(self, filepath: Path) -> Optional[dict]:
+        """Load the JSON mirror of a YAML file if it matches the file's mtime.
+
+        A hand-edited YAML file has a different mtime, so it is parsed instead.
+        """
+        try:
+            cache = json.loads(self._json_cache_path(filepath).read_bytes())
+            if cache.get("mtime_ns") == filepath.stat().st_mtime_ns:
+                return cache.get("data")
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def _save_json_cache(self, filepath: Path, data: dict) -> None:
+        """Write the JSON mirror of a just-saved YAML file."""
+        try:
+            cache = {"mtime_ns": filepath.stat().st_mtime_ns, "data": data}
+            # Owner-only, like the SSH keys next to it
+            fd = os.open(self._json_cache_path(filepath), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                os.fchmod(f.fileno(), 0o600)
+                f.write(json.dumps(cache))
+        except (OSError, TypeError, ValueError):
+            pass  # The mirror is only a cache, YAML stays authoritative
+
+    def _peek_yaml_key(self, filename: str, key: str, default: Any = None) -> Any:
+        """Read a single top-level scalar from a YAML file without loading it all.
+
+        Parsing stops as soon as the key's value has been seen.
+        """
+        filepath = self.config_dir / filename
+        if not filepath.exists():
+            return default
+
+        with open(filepath) as f:
+            depth = 0
+            position = 0  # Index of the current node in the top-level mapping
+            want_value = False
+            for event in yaml.parse(f, Loader=_YamlLoader):
+                if isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)):
+                    if want_value:
+                        return default  # Value is a collection, not a scalar
+                    depth += 1
+                    if depth == 1 and not isinstance(event, yaml.MappingStartEvent):
+                        return default
+                elif isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+                    depth -= 1
+                    if depth == 0:
+                        break
+                    if depth == 1:
+                        position += 1
+                elif depth == 1 and isinstance(event, (yaml.ScalarEvent, yaml.AliasEvent)):
+                    if want_value:
+                        if not isinstance(event, yaml.ScalarEvent):
+                            return default
+                        if event.style:
+                            return event.value  # Quoted scalars are always strings
+                        return yaml.load(event.value, Loader=_YamlLoader)
+                    if position % 2 == 0 and isinstance(event, yaml.ScalarEvent) and event.value == key:
+                        want_value = True
+                    position += 1
+
+        return default
 
     def config_exists(self) -> bool:
         """Check if configuration files exist."""
@@ -275,9 +432,12 @@ class ConfigLoader:
         """Check if this is the first run."""
         if not self.config_exists():
             return True
+        if self._settings is not None:
+            return not self._settings.first_run_complete
         try:
-            settings = self.load_settings()
-            return not settings.first_run_complete
+            value = self._peek_yaml_key("settings.yaml", "first_run_complete", False)
+            # Coerce like the Settings model would (e.g. a quoted "true")
+            return not _BOOL_ADAPTER.validate_python(value)
         except Exception:
             return True
 
@@ -285,12 +445,12 @@ class ConfigLoader:
         """Load global settings."""
         if self._settings is None or reload:
             data = self._load_yaml("settings.yaml")
-            self._settings = Settings(**data)
+            self._settings = _SETTINGS_ADAPTER.validate_python(data)
         return self._settings
 
     def save_settings(self, settings: Settings) -> None:
         """Save global settings."""
-        data = settings.model_dump()
+        data = _SETTINGS_ADAPTER.dump_python(settings)
         self._save_yaml("settings.yaml", data)
         self._settings = settings
 
@@ -307,13 +467,14 @@ class ConfigLoader:
         """Load VM configurations."""
         if self._vms is None or reload:
             data = self._load_yaml("vms.yaml")
-            self._vms = VMsConfig(**data)
+            self._vms = _VMS_ADAPTER.validate_python(data)
         return self._vms
 
     def save_vms(self, vms_config: VMsConfig) -> None:
         """Save VM configurations."""
-        data = {"vms": [vm.model_dump() for vm in vms_config.vms]}
+        data = _VMS_ADAPTER.dump_python(vms_config)
         self._save_yaml("vms.yaml", data)
+        vms_config.reindex()
         self._vms = vms_config
 
     def add_vm(self, vm: VMConfig) -> None:
@@ -325,44 +486,43 @@ class ConfigLoader:
     def update_vm(self, vm_name: str, updated_vm: VMConfig) -> bool:
         """Update an existing VM configuration."""
         vms = self.load_vms()
-        for i, vm in enumerate(vms.vms):
-            if vm.name == vm_name:
-                vms.vms[i] = updated_vm
-                self.save_vms(vms)
-                return True
-        return False
+        i = vms._index_of(vm_name)
+        if i is None:
+            return False
+        vms.vms[i] = updated_vm
+        self.save_vms(vms)
+        return True
 
     def remove_vm(self, name: str) -> bool:
         """Remove a VM from the configuration."""
         vms = self.load_vms()
-        original_count = len(vms.vms)
+        if vms._index_of(name) is None:
+            return False
         vms.vms = [vm for vm in vms.vms if vm.name != name]
-        if len(vms.vms) < original_count:
-            self.save_vms(vms)
-            return True
-        return False
+        self.save_vms(vms)
+        return True
 
     def update_vm_stacks(self, vm_name: str, stacks: list[str]) -> None:
         """Update the deployed stacks for a VM."""
         vms = self.load_vms()
-        for vm in vms.vms:
-            if vm.name == vm_name:
-                vm.stacks = stacks
-                break
+        vm = vms.get_vm_by_name(vm_name)
+        if vm is None or vm.stacks == stacks:
+            return  # Nothing changed, skip rewriting vms.yaml
+        vm.stacks = stacks
         self.save_vms(vms)
 
     def update_vm_network(self, vm_name: str, network: VMNetworkConfig) -> bool:
         """Update network configuration for a VM."""
         vms = self.load_vms()
-        for vm in vms.vms:
-            if vm.name == vm_name:
-                vm.network = network
-                # Also update host if IP is set
-                if network.ip_address:
-                    vm.host = network.ip_address
-                self.save_vms(vms)
-                return True
-        return False
+        vm = vms.get_vm_by_name(vm_name)
+        if vm is None:
+            return False
+        vm.network = network
+        # Also update host if IP is set
+        if network.ip_address:
+            vm.host = network.ip_address
+        self.save_vms(vms)
+        return True
 
     def get_available_ips(self) -> list[str]:
         """Get available IPs based on network config and used IPs."""
@@ -1,13 +1,17 @@
 """Docker and Docker Compose management on remote VMs."""
 
+import json
+import shlex
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from typing import Optional
 
 from .config_loader import VMConfig
-from .ssh_manager import SSHManager, get_ssh_manager
+from .ssh_manager import STEP_MARKER, SSHManager, get_ssh_manager
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ContainerStatus:
     """Status of a Docker container."""
     name: str
@@ -18,6 +22,20 @@ class ContainerStatus:
 
 
 @dataclass
+class DockerEnvironment:
+    """Docker tooling available on a VM."""
+    docker_installed: bool
+    compose_v2: bool
+    compose_v1: bool
+    version: Optional[str]
+
+    @property
+    def compose_installed(self) -> bool:
+        """Whether any Docker Compose variant is available."""
+        return self.compose_v2 or self.compose_v1
+
+
+@dataclass(slots=True, frozen=True)
 class StackStatus:
     """Status of a Docker Compose stack."""
     name: str
@@ -29,6 +47,9 @@ class StackStatus:
 class DockerManager:
     """Manages Docker operations on remote VMs."""
 
+    # Shared template for all compose commands run inside a stack directory
+    _COMPOSE_CMD = "cd {path} && docker compose {args}"
+
     def __init__(self, ssh_manager: Optional[SSHManager] = None):
         """Initialize Docker manager."""
         self.ssh = ssh_manager or get_ssh_manager()
@@ -40,12 +61,8 @@ class DockerManager:
 
     def is_compose_installed(self, vm: VMConfig) -> bool:
         """Check if Docker Compose is installed on the VM."""
-        # Try docker compose (v2) first
-        result = self.ssh.run_command(vm, "docker compose version")
-        if result.success:
-            return True
-        # Fall back to docker-compose (v1)
-        result = self.ssh.run_command(vm, "docker-compose --version")
+        # Try docker compose (v2) first, fall back to docker-compose (v1)
+        result = self.ssh.run_command(vm, "docker compose version || docker-compose --version")
         return result.success
 
     def get_docker_version(self, vm: VMConfig) -> Optional[str]:
@@ -55,6 +72,25 @@ class DockerManager:
             return result.stdout
         return None
 
+    def get_docker_env(self, vm: VMConfig) -> DockerEnvironment:
+        """Probe Docker, Compose v2 and Compose v1 with a single command."""
+        result = self.ssh.run_command(
+            vm,
+            "docker --version 2>/dev/null; echo ---; "
+            "docker compose version 2>/dev/null; echo ---; "
+            "docker-compose --version 2>/dev/null"
+        )
+        sections = [part.strip() for part in result.stdout.split("---")]
+        sections += [""] * (3 - len(sections))
+        version, compose_v2, compose_v1 = sections[:3]
+
+        return DockerEnvironment(
+            docker_installed=bool(version),
+            compose_v2=bool(compose_v2),
+            compose_v1=bool(compose_v1),
+            version=version or None,
+        )
+
     def install_docker(self, vm: VMConfig) -> tuple[bool, str]:
         """Install Docker on the VM using official script."""
         commands = [
@@ -65,57 +101,89 @@ class DockerManager:
             "rm /tmp/get-docker.sh"
         ]
 
-        for cmd in commands:
-            result = self.ssh.run_command(vm, cmd)
-            if not result.success:
-                return False, f"Failed at: {cmd}\n{result.stderr}"
+        # Run all steps in one SSH round-trip, stopping at the first failure.
+        # A marker line before each step tells which one failed.
+        script = "\n".join(
+            f"printf '\\n%s%d\\n' '{STEP_MARKER}' {i}\n{cmd} || exit $?"
+            for i, cmd in enumerate(commands)
+        )
+        result = self.ssh.run_command(vm, script)
+        if not result.success:
+            step = 0
+            for line in result.stdout.splitlines():
+                if line.startswith(STEP_MARKER):
+                    step = int(line[len(STEP_MARKER):])
+            return False, f"Failed at: {commands[step]}\n{result.stderr}"
 
         return True, "Docker installed successfully"
 
+    def _parse_containers(
+        self,
+        output: str,
+        compose: bool = False,
+        all_running: bool = False
+    ) -> list[ContainerStatus]:
+        """Parse one JSON object per line from docker/compose ps --format '{{json .}}'."""
+        containers = []
+        for line in output.splitlines():
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                continue
+
+            status = data.get("Status", "")
+            running = all_running or status.startswith("Up")
+            if compose and not running:
+                running = "running" in status.lower()
+            containers.append(ContainerStatus(
+                name=data.get("Name" if compose else "Names", ""),
+                image=data.get("Image", ""),
+                status=status,
+                ports=data.get("Ports", ""),
+                running=running
+            ))
+        return containers
+
     def get_running_containers(self, vm: VMConfig) -> list[ContainerStatus]:
         """Get list of running containers on the VM."""
-        result = self.ssh.run_command(
-            vm,
-            "docker ps --format '{{.Names}}|{{.Image}}|{{.Status}}|{{.Ports}}'"
-        )
+        result = self.ssh.run_command(vm, "docker ps --format '{{json .}}'")
 
-        containers = []
         if result.success and result.stdout:
-            for line in result.stdout.split('\n'):
-                if '|' in line:
-                    parts = line.split('|')
-                    if len(parts) >= 4:
-                        containers.append(ContainerStatus(
-                            name=parts[0],
-                            image=parts[1],
-                            status=parts[2],
-                            ports=parts[3],
-                            running=True
-                        ))
-        return containers
+            return self._parse_containers(result.stdout, all_running=True)
+        return []
+
+    def get_running_containers_bulk(self, vms: list[VMConfig]) -> dict[str, list[ContainerStatus]]:
+        """Get running containers for several VMs concurrently.
+
+        VMs that cannot be reached map to an empty list.
+        """
+        if not vms:
+            return {}
+
+        results: dict[str, list[ContainerStatus]] = {}
+        with ThreadPoolExecutor(max_workers=min(32, len(vms))) as executor:
+            futures = {executor.submit(self.get_running_containers, vm): vm for vm in vms}
+            for future in as_completed(futures):
+                vm = futures[future]
+                try:
+                    results[vm.name] = future.result()
+                except Exception:
+                    results[vm.name] = []
+        return results
 
     def get_all_containers(self, vm: VMConfig) -> list[ContainerStatus]:
         """Get list of all containers on the VM."""
-        result = self.ssh.run_command(
-            vm,
-            "docker ps -a --format '{{.Names}}|{{.Image}}|{{.Status}}|{{.Ports}}'"
-        )
+        result = self.ssh.run_command(vm, "docker ps -a --format '{{json .}}'")
 
-        containers = []
         if result.success and result.stdout:
-            for line in result.stdout.split('\n'):
-                if '|' in line:
-                    parts = line.split('|')
-                    if len(parts) >= 4:
-                        running = "Up" in parts[2]
-                        containers.append(ContainerStatus(
-                            name=parts[0],
-                            image=parts[1],
-                            status=parts[2],
-                            ports=parts[3],
-                            running=running
-                        ))
-        return containers
+            return self._parse_containers(result.stdout)
+        return []
+
+    def _compose_command(self, stack_path: str, args: str) -> str:
+        """Build a docker compose command for a stack directory."""
+        return self._COMPOSE_CMD.format(path=shlex.quote(stack_path), args=args)
 
     def compose_up(
         self,
@@ -124,9 +192,7 @@ class DockerManager:
         detach: bool = True
     ) -> tuple[bool, str]:
         """Run docker compose up for a stack."""
-        cmd = f"cd {stack_path} && docker compose up"
-        if detach:
-            cmd += " -d"
+        cmd = self._compose_command(stack_path, "up -d" if detach else "up")
 
         result = self.ssh.run_command(vm, cmd)
         if result.success:
@@ -140,10 +206,16 @@ class DockerManager:
         remove_volumes: bool = False
     ) -> tuple[bool, str]:
         """Run docker compose down for a stack."""
-        cmd = f"cd {stack_path} && docker compose down"
-        if remove_volumes:
-            cmd += " -v"
+        cmd = self._compose_command(stack_path, "down -v" if remove_volumes else "down")
+
+        result = self.ssh.run_command(vm, cmd)
+        if result.success:
+            return True, result.stdout
+        return False, result.stderr
 
+    def compose_restart(self, vm: VMConfig, stack_path: str) -> tuple[bool, str]:
+        """Restart a stack's containers in place."""
+        cmd = self._compose_command(stack_path, "restart")
         result = self.ssh.run_command(vm, cmd)
         if result.success:
             return True, result.stdout
@@ -151,7 +223,7 @@ class DockerManager:
 
     def compose_pull(self, vm: VMConfig, stack_path: str) -> tuple[bool, str]:
         """Pull latest images for a stack."""
-        cmd = f"cd {stack_path} && docker compose pull"
+        cmd = self._compose_command(stack_path, "pull")
         result = self.ssh.run_command(vm, cmd)
         if result.success:
             return True, result.stdout
@@ -165,51 +237,40 @@ class DockerManager:
         service: Optional[str] = None
     ) -> str:
         """Get logs from a stack."""
-        cmd = f"cd {stack_path} && docker compose logs --tail={tail}"
+        args = f"logs --tail={int(tail)}"
         if service:
-            cmd += f" {service}"
+            args = f"{args} {shlex.quote(service)}"
+        cmd = self._compose_command(stack_path, args)
 
         result = self.ssh.run_command(vm, cmd)
         return result.stdout if result.success else result.stderr
 
     def compose_ps(self, vm: VMConfig, stack_path: str) -> list[ContainerStatus]:
         """Get container status for a stack."""
-        cmd = f"cd {stack_path} && docker compose ps --format '{{{{.Name}}}}|{{{{.Image}}}}|{{{{.Status}}}}|{{{{.Ports}}}}'"
+        cmd = self._compose_command(stack_path, "ps --format '{{json .}}'")
         result = self.ssh.run_command(vm, cmd)
 
-        containers = []
         if result.success and result.stdout:
-            for line in result.stdout.split('\n'):
-                if '|' in line:
-                    parts = line.split('|')
-                    if len(parts) >= 4:
-                        running = "Up" in parts[2] or "running" in parts[2].lower()
-                        containers.append(ContainerStatus(
-                            name=parts[0],
-                            image=parts[1],
-                            status=parts[2],
-                            ports=parts[3],
-                            running=running
-                        ))
-        return containers
+            return self._parse_containers(result.stdout, compose=True)
+        return []
 
     def restart_container(self, vm: VMConfig, container_name: str) -> tuple[bool, str]:
         """Restart a container."""
-        result = self.ssh.run_command(vm, f"docker restart {container_name}")
+        result = self.ssh.run_command(vm, f"docker restart {shlex.quote(container_name)}")
         if result.success:
             return True, f"Container {container_name} restarted"
         return False, result.stderr
 
     def stop_container(self, vm: VMConfig, container_name: str) -> tuple[bool, str]:
         """Stop a container."""
-        result = self.ssh.run_command(vm, f"docker stop {container_name}")
+        result = self.ssh.run_command(vm, f"docker stop {shlex.quote(container_name)}")
         if result.success:
             return True, f"Container {container_name} stopped"
         return False, result.stderr
 
     def start_container(self, vm: VMConfig, container_name: str) -> tuple[bool, str]:
         """Start a container."""
-        result = self.ssh.run_command(vm, f"docker start {container_name}")
+        result = self.ssh.run_command(vm, f"docker start {shlex.quote(container_name)}")
         if result.success:
             return True, f"Container {container_name} started"
         return False, result.stderr
@@ -221,7 +282,7 @@ class DockerManager:
         tail: int = 100
     ) -> str:
         """Get logs from a specific container."""
-        result = self.ssh.run_command(vm, f"docker logs --tail={tail} {container_name}")
+        result = self.ssh.run_command(vm, f"docker logs --tail={int(tail)} {shlex.quote(container_name)}")
         return result.stdout if result.success else result.stderr
 
     def prune_images(self, vm: VMConfig) -> tuple[bool, str]:
@@ -239,13 +300,16 @@ class DockerManager:
         return False, result.stderr
 
 
-# Global Docker manager instance
+# Global Docker manager instance (created on first call)
 _docker_manager: Optional[DockerManager] = None
+_docker_manager_lock = threading.Lock()
 
 
 def get_docker_manager() -> DockerManager:
     """Get or create the global Docker manager instance."""
     global _docker_manager
     if _docker_manager is None:
-        _docker_manager = DockerManager()
+        with _docker_manager_lock:
+            if _docker_manager is None:
+                _docker_manager = DockerManager()
     return _docker_manager
@@ -1,6 +1,9 @@
 """LXC Container Manager - orchestrates Proxmox LXC container creation."""
 
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Callable, Optional
@@ -14,11 +17,16 @@ from .config_loader import (
     VMNetworkConfig,
     get_config_loader,
 )
+from .network_utils import prefix_to_netmask
 from .proxmox_api import ProxmoxAPI, ProxmoxAPIError, get_proxmox_api
 from .ssh_manager import SSHKeyManager, get_ssh_key_manager
 
 
-@dataclass
+# How long delete_container waits for a stopping container to go down
+STOP_CONFIRM_TIMEOUT = 10.0
+
+
+@dataclass(slots=True)
 class LXCCreationResult:
     """Result of LXC container creation."""
     success: bool
@@ -30,7 +38,7 @@ class LXCCreationResult:
     error: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class LXCCreationConfig:
     """Configuration for creating an LXC container."""
     hostname: str
@@ -50,6 +58,29 @@ class LXCCreationConfig:
     bridge: str = ""  # Empty = use default
     vmid: int = 0  # 0 = auto-assign
 
+# How long the first cluster node is reused when no default node is configured
+FIRST_NODE_TTL = 30.0
+
+# How long an auto-selected template is reused per (node, storage)
+TEMPLATE_TTL = 300.0
+
+# Root keypair shared by new containers when lxc_defaults.shared_bootstrap_key is set
+BOOTSTRAP_KEY_NAME = "bootstrap_root"
+
+
+@dataclass(slots=True)
+class _PendingContainer:
+    """A container whose creation task has been submitted but not awaited."""
+    config: LXCCreationConfig
+    node: str
+    vmid: int
+    upid: str
+    private_key_path: str
+    netmask: str
+    gateway: str
+    dns_primary: str
+    dns_secondary: str
+
 
 class LXCManager:
     """Manages LXC container lifecycle through Proxmox API."""
@@ -63,28 +94,72 @@ class LXCManager:
         self.config_loader = config_loader or get_config_loader()
         self.ssh_key_manager = ssh_key_manager or get_ssh_key_manager()
         self._api: Optional[ProxmoxAPI] = None
+        self._api_lock = threading.Lock()
+        # Proxmox settings the current client (and node/template caches) belong to
+        self._api_config: Optional[ProxmoxConfig] = None
+        self._vmid_lock = threading.Lock()
+        self._key_lock = threading.Lock()
+        self._first_node_cache: Optional[tuple[float, str]] = None
+        self._template_cache: dict[tuple[str, str], tuple[float, str]] = {}
+
+    def _get_settings(self) -> Settings:
+        """Get settings through the config loader's cached copy."""
+        return self.config_loader.load_settings()
+
+    def invalidate(self) -> None:
+        """Drop the API client and lookup caches after the settings changed."""
+        self.close()
+
+    def close(self) -> None:
+        """Close the Proxmox API client and its pooled connections."""
+        with self._api_lock:
+            api, self._api = self._api, None
+            self._api_config = None
+            self._first_node_cache = None
+            self._template_cache.clear()
+        if api is not None:
+            api.close()
 
     def _get_api(self) -> ProxmoxAPI:
-        """Get configured Proxmox API client."""
-        if self._api is None:
-            settings = self.config_loader.load_settings()
-            pve = settings.proxmox
-
-            if not pve.enabled:
-                raise ProxmoxAPIError("Proxmox integration is not enabled")
-            if not pve.host or not pve.token_name or not pve.token_value:
-                raise ProxmoxAPIError("Proxmox configuration is incomplete")
-
-            self._api = ProxmoxAPI(
-                host=pve.host,
-                user=pve.user,
-                token_name=pve.token_name,
-                token_value=pve.token_value,
-                port=pve.port,
-                verify_ssl=pve.verify_ssl,
-            )
+        """Get configured Proxmox API client.
+
+        The client is rebuilt whenever the Proxmox settings differ from the
+        ones it was built from, however the settings were reloaded or saved.
+        """
+        pve = self._get_settings().proxmox
+        api = self._api
+        if api is not None and pve == self._api_config:
+            return api
 
-        return self._api
+        # Pool workers in create_containers may get here together; build one client
+        stale = None
+        try:
+            with self._api_lock:
+                if self._api is None or pve != self._api_config:
+                    stale, self._api = self._api, None
+                    self._first_node_cache = None
+                    self._template_cache.clear()
+
+                    if not pve.enabled:
+                        raise ProxmoxAPIError("Proxmox integration is not enabled")
+                    if not pve.host or not pve.token_name or not pve.token_value:
+                        raise ProxmoxAPIError("Proxmox configuration is incomplete")
+
+                    self._api = ProxmoxAPI(
+                        host=pve.host,
+                        user=pve.user,
+                        token_name=pve.token_name,
+                        token_value=pve.token_value,
+                        port=pve.port,
+                        verify_ssl=pve.verify_ssl,
+                    )
+                    self._api_config = pve.model_copy()
+                api = self._api
+        finally:
+            # Close a client built from outdated settings, even if the new settings are unusable
+            if stale is not None:
+                stale.close()
+        return api
 
     def test_connection(self) -> tuple[bool, str]:
         """Test Proxmox API connection."""
@@ -97,36 +172,63 @@ class LXCManager:
     def get_nodes(self) -> list[dict]:
         """Get available Proxmox nodes."""
         api = self._get_api()
-        return api.get_nodes()
+        nodes = api.get_nodes()
+        if nodes:
+            self._first_node_cache = (time.monotonic(), nodes[0]["node"])
+        return nodes
+
+    def _resolve_node(self, node: Optional[str] = None) -> str:
+        """Resolve a node name: explicit, configured default, or first cluster node."""
+        node = node or self._get_settings().proxmox.default_node
+        if node:
+            return node
+
+        cached = self._first_node_cache
+        if cached and time.monotonic() - cached[0] < FIRST_NODE_TTL:
+            return cached[1]
+
+        nodes = self.get_nodes()
+        return nodes[0]["node"] if nodes else ""
 
     def get_templates(self, node: str = None, storage: str = None) -> list[dict]:
         """Get available LXC templates."""
-        settings = self.config_loader.load_settings()
         api = self._get_api()
-
-        node = node or settings.proxmox.default_node
-        storage = storage or settings.proxmox.template_storage
-
-        if not node:
-            nodes = api.get_nodes()
-            if nodes:
-                node = nodes[0]["node"]
+        node = self._resolve_node(node)
+        storage = storage or self._get_settings().proxmox.template_storage
 
         return api.get_lxc_templates(node, storage)
 
     def get_storage_list(self, node: str = None) -> list[dict]:
         """Get available storage on a node."""
-        settings = self.config_loader.load_settings()
         api = self._get_api()
-
-        node = node or settings.proxmox.default_node
-        if not node:
-            nodes = api.get_nodes()
-            if nodes:
-                node = nodes[0]["node"]
+        node = self._resolve_node(node)
 
         return api.get_storage_list(node)
 
+    def _resolve_template(self, node: str, storage: str, explicit: str = "") -> str:
+        """Resolve a template: explicit, configured default, or a cached pick from storage."""
+        template = explicit or self._get_settings().proxmox.default_template
+        if template:
+            return template
+
+        key = (node, storage)
+        cached = self._template_cache.get(key)
+        if cached and time.monotonic() - cached[0] < TEMPLATE_TTL:
+            return cached[1]
+
+        # Try to find a Debian template
+        templates = self.get_templates(node, storage)
+        for t in templates:
+            if "debian" in t.get("volid", "").lower():
+                template = t["volid"]
+                break
+        if not template and templates:
+            template = templates[0]["volid"]
+
+        if template:
+            self._template_cache[key] = (time.monotonic(), template)
+        return template
+
     def get_next_vmid(self) -> int:
         """Get the next available VMID."""
         api = self._get_api()
@@ -139,14 +241,8 @@ class LXCManager:
 
     def get_containers(self, node: str = None) -> list[dict]:
         """Get all LXC containers on a node."""
-        settings = self.config_loader.load_settings()
         api = self._get_api()
-
-        node = node or settings.proxmox.default_node
-        if not node:
-            nodes = api.get_nodes()
-            if nodes:
-                node = nodes[0]["node"]
+        node = self._resolve_node(node)
 
         return api.get_lxc_containers(node)
 
@@ -170,24 +266,178 @@ class LXCManager:
                 progress_callback(msg)
 
         try:
-            settings = self.config_loader.load_settings()
-            pve = settings.proxmox
-            defaults = settings.lxc_defaults
-            api = self._get_api()
+            pending = self._submit_container(config, log)
+            if isinstance(pending, LXCCreationResult):
+                return pending
 
-            # Determine node
-            node = config.node or pve.default_node
-            if not node:
-                nodes = api.get_nodes()
-                if not nodes:
-                    return LXCCreationResult(
-                        success=False,
-                        error="No Proxmox nodes available"
-                    )
-                node = nodes[0]["node"]
+            self._wait_container(pending, log)
+            return self._register_container(pending, log)
+
+        except ProxmoxAPIError as e:
+            return LXCCreationResult(
+                success=False,
+                error=f"Proxmox API error: {e.message}",
+            )
+        except Exception as e:
+            return LXCCreationResult(
+                success=False,
+                error=f"Error: {str(e)}",
+            )
+
+    def create_containers(
+        self,
+        configs: list[LXCCreationConfig],
+        concurrency: int = 8,
+        batch_delay: float = 0,
+        progress_callback: Callable[[str], None] = None,
+    ) -> list[LXCCreationResult]:
+        """
+        Create several LXC containers, overlapping the Proxmox creation tasks.
+
+        Containers are submitted in batches of ``concurrency``; the creation
+        tasks of a batch are awaited in parallel before the next batch starts.
 
-            log(f"Using node: {node}")
+        Args:
+            configs: Container configurations
+            concurrency: Maximum containers in flight at once
+            batch_delay: Seconds to pause between batches
+            progress_callback: Optional callback for progress updates
 
+        Returns:
+            One LXCCreationResult per config, in the same order
+        """
+        def make_log(hostname: str) -> Callable[[str], None]:
+            def log(msg: str):
+                if progress_callback:
+                    progress_callback(f"[{hostname}] {msg}")
+            return log
+
+        def error_result(e: Exception) -> LXCCreationResult:
+            if isinstance(e, ProxmoxAPIError):
+                return LXCCreationResult(success=False, error=f"Proxmox API error: {e.message}")
+            return LXCCreationResult(success=False, error=f"Error: {str(e)}")
+
+        results: list[Optional[LXCCreationResult]] = [None] * len(configs)
+        concurrency = max(1, concurrency)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for batch_start in range(0, len(configs), concurrency):
+                if batch_start and batch_delay:
+                    time.sleep(batch_delay)
+                batch = range(batch_start, min(batch_start + concurrency, len(configs)))
+                logs = {i: make_log(configs[i].hostname) for i in batch}
+
+                # Submit phase: VMID allocation is serialized by _vmid_lock
+                submitted = {
+                    i: executor.submit(self._submit_container, configs[i], logs[i])
+                    for i in batch
+                }
+                pending: dict[int, _PendingContainer] = {}
+                for i, future in submitted.items():
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        results[i] = error_result(e)
+                        continue
+                    if isinstance(outcome, LXCCreationResult):
+                        results[i] = outcome
+                    else:
+                        pending[i] = outcome
+
+                # Wait phase: Proxmox tasks run concurrently
+                waits = {
+                    i: executor.submit(self._wait_container, p, logs[i])
+                    for i, p in pending.items()
+                }
+                for i, future in waits.items():
+                    try:
+                        future.result()
+                        # Config writes stay on this thread
+                        results[i] = self._register_container(pending[i], logs[i])
+                    except Exception as e:
+                        results[i] = error_result(e)
+
+        return results
+
+    def _submit_container(
+        self,
+        config: LXCCreationConfig,
+        log: Callable[[str], None],
+    ) -> "_PendingContainer | LXCCreationResult":
+        """Prepare a container and submit its creation task to Proxmox."""
+        settings = self._get_settings()
+        pve = settings.proxmox
+        defaults = settings.lxc_defaults
+        api = self._get_api()
+
+        # Determine node
+        node = self._resolve_node(config.node)
+        if not node:
+            return LXCCreationResult(
+                success=False,
+                error="No Proxmox nodes available"
+            )
+
+        log(f"Using node: {node}")
+
+        # Generate SSH keypair for root access (temporary, until initialization)
+        # Per-host keys are generated concurrently across a batch; only the
+        # shared key needs a lock so it is not created twice
+        if defaults.shared_bootstrap_key:
+            key_name, comment = BOOTSTRAP_KEY_NAME, "bootstrap@dsm"
+            key_lock = self._key_lock
+        else:
+            key_name, comment = f"{config.hostname}_root", f"root@{config.hostname}"
+            key_lock = nullcontext()
+        log(f"Generating root SSH keypair: {key_name}")
+        with key_lock:
+            private_key_path, public_key_path, public_key = self.ssh_key_manager.get_or_create_keypair(
+                key_name,
+                comment=comment
+            )
+        log(f"SSH key saved to: {private_key_path}")
+
+        # Determine template
+        template = self._resolve_template(node, pve.template_storage, config.template)
+        if not template:
+            return LXCCreationResult(
+                success=False,
+                error="No LXC template available. Please download one first."
+            )
+
+        # Ensure template has storage prefix
+        if ":" not in template:
+            template = f"{pve.template_storage}:vztmpl/{template}"
+
+        log(f"Using template: {template}")
+
+        # Build network configuration
+        bridge = config.bridge or pve.default_bridge
+        gateway = config.gateway or settings.network.gateway
+        dns1 = config.dns_primary or settings.network.dns_primary
+        dns2 = config.dns_secondary or settings.network.dns_secondary
+
+        netmask = config.netmask if config.netmask else "24"
+        net0 = f"name=eth0,bridge={bridge},ip={config.ip_address}/{netmask},gw={gateway}"
+
+        nameserver = dns1
+        if dns2:
+            nameserver = f"{dns1} {dns2}"
+
+        log(f"Network: {config.ip_address}/{netmask}, GW: {gateway}")
+
+        # Get container settings
+        memory = config.memory or defaults.memory
+        swap = config.swap or defaults.swap
+        cores = config.cores or defaults.cores
+        rootfs_size = config.rootfs_size or defaults.rootfs_size
+        storage = pve.default_storage
+
+        log(f"Resources: {memory}MB RAM, {cores} cores, {rootfs_size}GB disk")
+
+        # The next free VMID only changes once the create call is accepted,
+        # so allocation and submission must not interleave between threads.
+        with self._vmid_lock:
             # Get or validate VMID
             if config.vmid > 0:
                 # Use provided VMID if available
@@ -203,63 +453,6 @@ class LXCManager:
                 vmid = api.get_next_vmid()
                 log(f"Allocated VMID: {vmid}")
 
-            # Generate SSH keypair for root access (temporary, until initialization)
-            key_name = f"{config.hostname}_root"
-            log(f"Generating root SSH keypair: {key_name}")
-            private_key_path, public_key_path, public_key = self.ssh_key_manager.get_or_create_keypair(
-                key_name,
-                comment=f"root@{config.hostname}"
-            )
-            log(f"SSH key saved to: {private_key_path}")
-
-            # Determine template
-            template = config.template or pve.default_template
-            if not template:
-                # Try to find a Debian template
-                templates = self.get_templates(node, pve.template_storage)
-                for t in templates:
-                    if "debian" in t.get("volid", "").lower():
-                        template = t["volid"]
-                        break
-                if not template and templates:
-                    template = templates[0]["volid"]
-
-            if not template:
-                return LXCCreationResult(
-                    success=False,
-                    error="No LXC template available. Please download one first."
-                )
-
-            # Ensure template has storage prefix
-            if ":" not in template:
-                template = f"{pve.template_storage}:vztmpl/{template}"
-
-            log(f"Using template: {template}")
-
-            # Build network configuration
-            bridge = config.bridge or pve.default_bridge
-            gateway = config.gateway or settings.network.gateway
-            dns1 = config.dns_primary or settings.network.dns_primary
-            dns2 = config.dns_secondary or settings.network.dns_secondary
-
-            netmask = config.netmask if config.netmask else "24"
-            net0 = f"name=eth0,bridge={bridge},ip={config.ip_address}/{netmask},gw={gateway}"
-
-            nameserver = dns1
-            if dns2:
-                nameserver = f"{dns1} {dns2}"
-
-            log(f"Network: {config.ip_address}/{netmask}, GW: {gateway}")
-
-            # Get container settings
-            memory = config.memory or defaults.memory
-            swap = config.swap or defaults.swap
-            cores = config.cores or defaults.cores
-            rootfs_size = config.rootfs_size or defaults.rootfs_size
-            storage = pve.default_storage
-
-            log(f"Resources: {memory}MB RAM, {cores} cores, {rootfs_size}GB disk")
-
             # Create container
             log("Creating LXC container...")
             upid = api.create_lxc(
@@ -283,63 +476,71 @@ class LXCManager:
                 description=config.description or f"Created by Docker Stack Manager\nRole: {config.role}",
             )
 
-            # Wait for creation task
-            log("Waiting for container creation...")
-            api.wait_for_task(node, upid, timeout=300)
-            log("Container created successfully!")
-
-            # Add VM to configuration
-            log("Adding container to configuration...")
-            vm_config = VMConfig(
-                name=config.hostname,
-                host=config.ip_address,
-                user="root",  # Will be changed to "manager" after initialization
-                ssh_key=str(private_key_path),
-                ssh_port=22,
-                role=config.role,
-                description=config.description,
-                network=VMNetworkConfig(
-                    ip_address=config.ip_address,
-                    netmask=self._cidr_to_netmask(int(netmask)),
-                    gateway=gateway,
-                    dns_primary=dns1,
-                    dns_secondary=dns2,
-                ),
-                proxmox_vmid=vmid,
-                proxmox_type="lxc",
-                proxmox_node=node,
-                initialized=False,  # Must run Initialize to set up manager user
-            )
-            self.config_loader.add_vm(vm_config)
-
-            log("Container ready!")
-
-            return LXCCreationResult(
-                success=True,
-                vmid=vmid,
-                hostname=config.hostname,
+        return _PendingContainer(
+            config=config,
+            node=node,
+            vmid=vmid,
+            upid=upid,
+            private_key_path=str(private_key_path),
+            netmask=netmask,
+            gateway=gateway,
+            dns_primary=dns1,
+            dns_secondary=dns2,
+        )
+
+    def _wait_container(self, pending: "_PendingContainer", log: Callable[[str], None]) -> None:
+        """Block until the container creation task has finished."""
+        log("Waiting for container creation...")
+        self._get_api().wait_for_task(pending.node, pending.upid, timeout=300)
+        log("Container created successfully!")
+
+    def _register_container(
+        self,
+        pending: "_PendingContainer",
+        log: Callable[[str], None],
+    ) -> LXCCreationResult:
+        """Add a created container to the VM configuration."""
+        config = pending.config
+
+        log("Adding container to configuration...")
+        vm_config = VMConfig(
+            name=config.hostname,
+            host=config.ip_address,
+            user="root",  # Will be changed to "manager" after initialization
+            ssh_key=pending.private_key_path,
+            ssh_port=22,
+            role=config.role,
+            description=config.description,
+            network=VMNetworkConfig(
                 ip_address=config.ip_address,
-                ssh_key_path=str(private_key_path),
-                message=f"Container {config.hostname} (VMID {vmid}) created successfully",
-            )
-
-        except ProxmoxAPIError as e:
-            return LXCCreationResult(
-                success=False,
-                error=f"Proxmox API error: {e.message}",
-            )
-        except Exception as e:
-            return LXCCreationResult(
-                success=False,
-                error=f"Error: {str(e)}",
-            )
+                netmask=prefix_to_netmask(int(pending.netmask)),
+                gateway=pending.gateway,
+                dns_primary=pending.dns_primary,
+                dns_secondary=pending.dns_secondary,
+            ),
+            proxmox_vmid=pending.vmid,
+            proxmox_type="lxc",
+            proxmox_node=pending.node,
+            initialized=False,  # Must run Initialize to set up manager user
+        )
+        self.config_loader.add_vm(vm_config)
+
+        log("Container ready!")
+
+        return LXCCreationResult(
+            success=True,
+            vmid=pending.vmid,
+            hostname=config.hostname,
+            ip_address=config.ip_address,
+            ssh_key_path=pending.private_key_path,
+            message=f"Container {config.hostname} (VMID {pending.vmid}) created successfully",
+        )
 
     def start_container(self, vmid: int, node: str = None) -> tuple[bool, str]:
         """Start an LXC container."""
         try:
-            settings = self.config_loader.load_settings()
             api = self._get_api()
-            node = node or settings.proxmox.default_node
+            node = self._resolve_node(node)
 
             api.start_lxc(node, vmid)
             return True, f"Container {vmid} started"
@@ -349,9 +550,8 @@ class LXCManager:
     def stop_container(self, vmid: int, node: str = None) -> tuple[bool, str]:
         """Stop an LXC container."""
         try:
-            settings = self.config_loader.load_settings()
             api = self._get_api()
-            node = node or settings.proxmox.default_node
+            node = self._resolve_node(node)
 
             api.stop_lxc(node, vmid)
             return True, f"Container {vmid} stopped"
@@ -366,9 +566,8 @@ class LXCManager:
     ) -> tuple[bool, str]:
         """Delete an LXC container and optionally its SSH key."""
         try:
-            settings = self.config_loader.load_settings()
             api = self._get_api()
-            node = node or settings.proxmox.default_node
+            node = self._resolve_node(node)
 
             # Get container info to find hostname
             try:
@@ -382,18 +581,28 @@ class LXCManager:
                 status = api.get_lxc_status(node, vmid)
                 if status.get("status") == "running":
                     upid = api.stop_lxc(node, vmid)
-                    # Wait for stop task to complete
+                    # A stop task that finished with OK means the container is down
+                    stopped = False
                     if upid:
                         try:
                             api.wait_for_task(node, upid, timeout=60)
-                        except Exception:
+                            stopped = True
+                        except ProxmoxAPIError:
                             pass
-                    # Additional wait to ensure container is fully stopped
-                    for _ in range(10):
-                        time.sleep(1)
-                        status = api.get_lxc_status(node, vmid)
-                        if status.get("status") != "running":
-                            break
+                    if not stopped:
+                        # Confirm the container is down, backing off if it is still running
+                        deadline = time.monotonic() + STOP_CONFIRM_TIMEOUT
+                        delay = 0.1
+                        while True:
+                            status = api.get_lxc_status(node, vmid)
+                            if status.get("status") != "running":
+                                break
+                            remaining = deadline - time.monotonic()
+                            if remaining <= 0:
+                                break
+                            # Don't let the last backoff step overshoot the deadline
+                            time.sleep(min(delay, remaining))
+                            delay = min(delay * 2, 2.0)
             except Exception:
                 pass
 
@@ -420,19 +629,17 @@ class LXCManager:
         except ProxmoxAPIError as e:
             return False, str(e)
 
-    def _cidr_to_netmask(self, prefix: int) -> str:
-        """Convert CIDR prefix to netmask."""
-        mask = (0xffffffff >> (32 - prefix)) << (32 - prefix)
-        return f"{(mask >> 24) & 0xff}.{(mask >> 16) & 0xff}.{(mask >> 8) & 0xff}.{mask & 0xff}"
-
 
-# Global instance
+# Global instance (created on first call)
 _lxc_manager: Optional[LXCManager] = None
+_lxc_manager_lock = threading.Lock()
 
 
 def get_lxc_manager() -> LXCManager:
     """Get or create the global LXC manager instance."""
     global _lxc_manager
     if _lxc_manager is None:
-        _lxc_manager = LXCManager()
+        with _lxc_manager_lock:
+            if _lxc_manager is None:
+                _lxc_manager = LXCManager()
     return _lxc_manager
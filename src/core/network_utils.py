@@ -0,0 +1,60 @@
+"""IPv4 helpers shared by the core managers and the TUI."""
+
+import ipaddress
+import re
+import socket
+from functools import lru_cache
+from typing import Optional
+
+# RFC 1123 labels: 1-63 alphanumerics or hyphens, not starting or ending with a hyphen
+_HOSTNAME_RE = re.compile(r'(?!-)[A-Za-z0-9-]{1,63}(?<!-)(\.(?!-)[A-Za-z0-9-]{1,63}(?<!-))*\.?', re.ASCII)
+
+
+@lru_cache(maxsize=33)
+def prefix_to_netmask(prefix: int) -> str:
+    """Convert a CIDR prefix to a dotted netmask (255.255.255.0 if out of range)."""
+    if not 0 <= prefix <= 32:
+        return "255.255.255.0"
+    return str(ipaddress.IPv4Network((0, prefix)).netmask)
+
+
+@lru_cache(maxsize=64)
+def netmask_to_prefix(netmask: str) -> Optional[int]:
+    """Convert a dotted netmask to its CIDR prefix (None if not a valid netmask)."""
+    try:
+        mask = int(ipaddress.IPv4Address(netmask))
+    except (ValueError, TypeError):
+        return None
+    prefix = mask.bit_count()
+    # Reject non-contiguous masks such as 255.0.255.0
+    if mask != (0xFFFFFFFF << (32 - prefix)) & 0xFFFFFFFF:
+        return None
+    return prefix
+
+
+def is_valid_hostname(hostname: str) -> bool:
+    """Check whether a string is a valid DNS hostname."""
+    return len(hostname) <= 253 and _HOSTNAME_RE.fullmatch(hostname) is not None
+
+
+@lru_cache(maxsize=64)
+def _cached_network(network_ip: str, prefix: str) -> ipaddress.IPv4Network | ipaddress.IPv6Network:
+    """Parse a network once per (address, prefix) pair."""
+    return ipaddress.ip_network(f"{network_ip}/{prefix}", strict=False)
+
+
+def is_ip_in_subnet(ip: str, network_ip: str, prefix: int | str) -> bool:
+    """Check if an IP address is within the given network."""
+    try:
+        return ipaddress.ip_address(ip) in _cached_network(network_ip, str(prefix))
+    except (ValueError, TypeError):
+        return False
+
+
+def is_valid_ipv4(ip: str) -> bool:
+    """Check whether a string is a dotted-quad IPv4 address."""
+    try:
+        socket.inet_pton(socket.AF_INET, ip)
+        return True
+    except (OSError, TypeError):
+        return False
@@ -1,14 +1,30 @@
 """Proxmox VE API client for LXC container management."""
 
+import atexit
+import json
+import random
 import time
 import urllib3
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# orjson parses response bytes directly and is noticeably faster on large
+# listings; the stdlib parser is used when it is not installed
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
 
 # Disable SSL warnings for self-signed certificates (common in Proxmox)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# (connect, read) timeout in seconds; fail fast on unreachable hosts
+REQUEST_TIMEOUT = (5, 30)
+
 
 class ProxmoxAPIError(Exception):
     """Exception raised for Proxmox API errors."""
@@ -51,6 +67,40 @@ class ProxmoxAPI:
         # Build authorization header
         self.auth_header = f"PVEAPIToken={user}!{token_name}={token_value}"
 
+        # Pooled session so consecutive calls reuse the same TLS connection.
+        # Connection failures are retried; gateway errors only for idempotent
+        # methods (urllib3's default allowed_methods excludes POST).
+        self._session = requests.Session()
+        self._session.verify = verify_ssl
+        self._session.headers["Authorization"] = self.auth_header
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=2,
+                connect=2,
+                read=0,
+                status=2,
+                status_forcelist=(502, 503, 504),
+                backoff_factor=0.2,
+                raise_on_status=False,
+            ),
+        )
+        self._session.mount("https://", adapter)
+
+        # Short-lived cache for read-mostly GETs: (endpoint, params) -> (timestamp, data)
+        self._cache: dict[tuple, tuple[float, Any]] = {}
+
+    def close(self) -> None:
+        """Close pooled HTTP connections."""
+        self._session.close()
+
+    def __enter__(self) -> "ProxmoxAPI":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
     def _request(
         self,
         method: str,
@@ -62,39 +112,27 @@ class ProxmoxAPI:
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
 
         try:
-            if method in ("POST", "PUT"):
-                # Proxmox expects form data, not JSON
-                # Only include Authorization header (no Content-Type for empty body)
-                response = requests.request(
-                    method=method,
-                    url=url,
-                    headers={"Authorization": self.auth_header},
-                    data=data if data else None,
-                    verify=self.verify_ssl,
-                    timeout=30,
-                )
-            else:
-                # GET, DELETE requests
-                response = requests.request(
-                    method=method,
-                    url=url,
-                    headers={"Authorization": self.auth_header},
-                    params=params,
-                    verify=self.verify_ssl,
-                    timeout=30,
-                )
+            # Proxmox expects form data, not JSON; requests only sets a
+            # Content-Type when there is a body. Auth comes from the session.
+            response = self._session.request(
+                method=method,
+                url=url,
+                data=data or None,
+                params=params,
+                timeout=REQUEST_TIMEOUT,
+            )
 
             # Parse response - handle empty responses
-            response_text = response.text.strip()
-            if not response_text:
+            raw = response.content
+            if not raw or raw.isspace():
                 # Empty response is OK for some operations (start/stop return UPID in data)
                 result = {"data": None}
             else:
                 try:
-                    result = response.json()
+                    result = _json_loads(raw)
                 except ValueError:
                     # If response isn't JSON but not empty, wrap it
-                    result = {"data": response_text}
+                    result = {"data": response.text.strip()}
 
             # Check for errors
             if response.status_code >= 400:
@@ -116,21 +154,44 @@ class ProxmoxAPI:
 
     def post(self, endpoint: str, data: dict = None) -> Any:
         """POST request."""
+        self.invalidate()
         return self._request("POST", endpoint, data=data)
 
     def put(self, endpoint: str, data: dict = None) -> Any:
         """PUT request."""
+        self.invalidate()
         return self._request("PUT", endpoint, data=data)
 
     def delete(self, endpoint: str) -> Any:
         """DELETE request."""
+        self.invalidate()
         return self._request("DELETE", endpoint)
 
+    def _cached_get(self, endpoint: str, ttl: float, params: dict = None) -> Any:
+        """GET request, reusing a response younger than ttl seconds."""
+        key = (endpoint, tuple(sorted(params.items())) if params else ())
+        cached = self._cache.get(key)
+        if cached and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+
+        data = self.get(endpoint, params=params)
+        self._cache[key] = (time.monotonic(), data)
+        return data
+
+    def invalidate(self, prefix: str = "") -> None:
+        """Drop cached responses whose endpoint starts with prefix (all by default)."""
+        if not prefix:
+            self._cache.clear()
+            return
+        for key in list(self._cache):
+            if key[0].startswith(prefix):
+                self._cache.pop(key, None)
+
     # ==================== Cluster/Node Methods ====================
 
     def get_nodes(self) -> list[dict]:
         """Get all nodes in the cluster."""
-        return self.get("nodes")
+        return self._cached_get("nodes", ttl=30)
 
     def get_node_status(self, node: str) -> dict:
         """Get status of a specific node."""
@@ -138,12 +199,13 @@ class ProxmoxAPI:
 
     def get_version(self) -> dict:
         """Get Proxmox version info."""
-        return self.get("version")
+        return self._cached_get("version", ttl=300)
 
     def test_connection(self) -> tuple[bool, str]:
         """Test API connection."""
         try:
-            version = self.get_version()
+            # Bypass the cache so a dead connection is actually noticed
+            version = self.get("version")
             return True, f"Connected to Proxmox VE {version.get('version', 'unknown')}"
         except ProxmoxAPIError as e:
             return False, str(e)
@@ -168,22 +230,43 @@ class ProxmoxAPI:
         """Get the next available VMID."""
         return int(self.get("cluster/nextid"))
 
+    def get_used_vmids(self, ttl: float = 5.0) -> frozenset[int]:
+        """Get all VMIDs in use across the cluster (cached for ttl seconds)."""
+        key = ("cluster/resources", (("type", "vm"),))
+        cached = self._cache.get(key)
+        if cached and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+
+        resources = self.get("cluster/resources", params={"type": "vm"})
+        used = frozenset(int(r["vmid"]) for r in resources if "vmid" in r)
+        self._cache[key] = (time.monotonic(), used)
+        return used
+
     def is_vmid_available(self, vmid: int) -> bool:
         """Check if a VMID is available (not in use)."""
         try:
-            resources = self.get("cluster/resources", params={"type": "vm"})
-            used_vmids = {r.get("vmid") for r in resources}
-            return vmid not in used_vmids
+            return vmid not in self.get_used_vmids()
         except ProxmoxAPIError:
             return False
 
+    def find_free_vmids(self, count: int, start: int = 100) -> list[int]:
+        """Find the first count unused VMIDs at or above start."""
+        used = self.get_used_vmids()
+        free = []
+        vmid = start
+        while len(free) < count:
+            if vmid not in used:
+                free.append(vmid)
+            vmid += 1
+        return free
+
     def get_storage_list(self, node: str) -> list[dict]:
         """Get available storage on a node."""
-        return self.get(f"nodes/{node}/storage")
+        return self._cached_get(f"nodes/{node}/storage", ttl=60)
 
     def get_lxc_templates(self, node: str, storage: str) -> list[dict]:
         """Get available LXC templates on a storage."""
-        content = self.get(f"nodes/{node}/storage/{storage}/content")
+        content = self._cached_get(f"nodes/{node}/storage/{storage}/content", ttl=120)
         return [item for item in content if item.get("content") == "vztmpl"]
 
     def download_lxc_template(
@@ -378,6 +461,24 @@ class ProxmoxAPI:
         else:
             raise ProxmoxAPIError(f"Unknown VM type: {vm_type}")
 
+    def get_vm_statuses(self, items: list[tuple[str, int, str]]) -> list[dict]:
+        """Get status for several (node, vmid, vm_type) items concurrently.
+
+        Results are returned in input order; items that fail map to an empty dict.
+        """
+        if not items:
+            return []
+
+        def status(item: tuple[str, int, str]) -> dict:
+            try:
+                return self.get_vm_status(*item)
+            except ProxmoxAPIError:
+                return {}
+
+        # Bounded by the session's connection pool size
+        with ThreadPoolExecutor(max_workers=min(16, len(items))) as executor:
+            return list(executor.map(status, items))
+
     def is_configured(self) -> bool:
         """Check if API is properly configured."""
         return bool(self.host and self.auth_header)
@@ -393,7 +494,7 @@ class ProxmoxAPI:
         node: str,
         upid: str,
         timeout: int = 300,
-        interval: float = 2.0,
+        interval: float = 5.0,
     ) -> dict:
         """
         Wait for a task to complete.
@@ -402,7 +503,8 @@ class ProxmoxAPI:
             node: Node name
             upid: Task UPID
             timeout: Maximum wait time in seconds
-            interval: Poll interval in seconds
+            interval: Maximum poll interval in seconds (polling starts at 0.1s
+                and backs off, so short tasks are noticed quickly)
 
         Returns:
             Final task status
@@ -411,6 +513,7 @@ class ProxmoxAPI:
             ProxmoxAPIError: If task fails or times out
         """
         start_time = time.time()
+        delay = 0.1
 
         while True:
             status = self.get_task_status(node, upid)
@@ -427,13 +530,21 @@ class ProxmoxAPI:
             if time.time() - start_time > timeout:
                 raise ProxmoxAPIError(f"Task timeout after {timeout}s")
 
-            time.sleep(interval)
+            # Jitter keeps concurrent waiters from polling in lockstep
+            time.sleep(delay + random.uniform(0, 0.1 * delay))
+            delay = min(delay * 1.7, interval)
 
 
 # Global instance
 _proxmox_api: Optional[ProxmoxAPI] = None
 
 
+def _close_proxmox_api() -> None:
+    """Close the global Proxmox API client at interpreter exit."""
+    if _proxmox_api is not None:
+        _proxmox_api.close()
+
+
 def get_proxmox_api(
     host: str = None,
     user: str = None,
@@ -444,6 +555,10 @@ def get_proxmox_api(
     """Get or create the global Proxmox API instance."""
     global _proxmox_api
     if host and user and token_name and token_value:
+        if _proxmox_api is not None:
+            _proxmox_api.close()
+        else:
+            atexit.register(_close_proxmox_api)
         _proxmox_api = ProxmoxAPI(
             host=host,
             user=user,
@@ -459,7 +574,7 @@ def init_proxmox_from_config(config: "ProxmoxConfig") -> Optional[ProxmoxAPI]:
     if not config.enabled or not config.host:
         return None
 
-    return get_proxmox_api(
+    api = get_proxmox_api(
         host=config.host,
         user=config.user,
         token_name=config.token_name,
@@ -467,3 +582,4 @@ def init_proxmox_from_config(config: "ProxmoxConfig") -> Optional[ProxmoxAPI]:
         port=config.port,
         verify_ssl=config.verify_ssl,
     )
+    return api
@@ -1,18 +1,23 @@
 """SSH connection and key management."""
 
 import io
+import os
+import stat
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable, Optional, Tuple
-
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import ed25519
-from fabric import Connection
-from invoke.exceptions import UnexpectedExit
-from paramiko import RSAKey, Ed25519Key, ECDSAKey
+from typing import TYPE_CHECKING, Any, Callable, Optional, Tuple
 
 from .config_loader import VMConfig
 
+# cryptography and fabric/paramiko are imported where they are used, so the
+# TUI does not pay for them until the first key is generated or SSH is opened
+if TYPE_CHECKING:
+    from fabric import Connection
+
 
 # =============================================================================
 # SSH Key Management
@@ -26,6 +31,8 @@ class SSHKeyManager:
         if keys_dir is None:
             keys_dir = Path(__file__).parent.parent.parent / "config" / "ssh_keys"
         self.keys_dir = Path(keys_dir)
+        # Public key contents by key name, validated against the file's mtime
+        self._pubkey_cache: dict[str, tuple[int, str]] = {}
         self._ensure_keys_dir()
 
     def _ensure_keys_dir(self) -> None:
@@ -35,6 +42,9 @@ class SSHKeyManager:
 
     def generate_keypair(self, name: str, comment: str = "") -> Tuple[Path, Path, str]:
         """Generate a new Ed25519 SSH keypair."""
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import ed25519
+
         private_key = ed25519.Ed25519PrivateKey.generate()
         public_key = private_key.public_key()
 
@@ -61,9 +71,27 @@ class SSHKeyManager:
 
         public_key_path.write_text(public_key_str + "\n")
         public_key_path.chmod(0o644)
+        self._pubkey_cache[name] = (public_key_path.stat().st_mtime_ns, public_key_str)
 
         return private_key_path, public_key_path, public_key_str
 
+    def _read_public_key(self, name: str) -> Optional[str]:
+        """Read a public key, reusing the cached content while the file is unchanged."""
+        public_key_path = self.keys_dir / f"{name}.pub"
+        try:
+            mtime = public_key_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._pubkey_cache.pop(name, None)
+            return None
+
+        cached = self._pubkey_cache.get(name)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        content = public_key_path.read_text().strip()
+        self._pubkey_cache[name] = (mtime, content)
+        return content
+
     def get_keypair(self, name: str) -> Tuple[Optional[Path], Optional[Path]]:
         """Get existing keypair paths."""
         private_key_path = self.keys_dir / name
@@ -78,23 +106,22 @@ class SSHKeyManager:
         private_path, public_path = self.get_keypair(name)
 
         if private_path and public_path:
-            public_key_content = public_path.read_text().strip()
-            return private_path, public_path, public_key_content
+            public_key_content = self._read_public_key(name)
+            if public_key_content is not None:
+                return private_path, public_path, public_key_content
 
         return self.generate_keypair(name, comment)
 
     def get_public_key(self, name: str) -> Optional[str]:
         """Get public key content by name."""
-        public_key_path = self.keys_dir / f"{name}.pub"
-        if public_key_path.exists():
-            return public_key_path.read_text().strip()
-        return None
+        return self._read_public_key(name)
 
     def delete_keypair(self, name: str) -> bool:
         """Delete a keypair by name."""
         private_key_path = self.keys_dir / name
         public_key_path = self.keys_dir / f"{name}.pub"
 
+        self._pubkey_cache.pop(name, None)
         deleted = False
         if private_key_path.exists():
             private_key_path.unlink()
@@ -108,11 +135,14 @@ class SSHKeyManager:
     def list_keys(self) -> list[str]:
         """List all key names (without extensions)."""
         keys = set()
-        for path in self.keys_dir.glob("*"):
-            if path.suffix == ".pub":
-                keys.add(path.stem)
-            elif not path.suffix and path.is_file():
-                keys.add(path.name)
+        # DirEntry type checks come from readdir, so no extra stat per entry
+        with os.scandir(self.keys_dir) as entries:
+            for entry in entries:
+                stem, dot, ext = entry.name.rpartition(".")
+                if dot and ext == "pub":
+                    keys.add(stem)
+                elif not dot and entry.is_file():
+                    keys.add(entry.name)
         return sorted(keys)
 
 
@@ -144,62 +174,184 @@ class CommandResult:
     @classmethod
     def from_fabric_result(cls, result) -> "CommandResult":
         """Create from Fabric result object."""
+        # Only trailing whitespace is trimmed; leading indentation in logs is kept
         return cls(
-            stdout=result.stdout.strip() if result.stdout else "",
-            stderr=result.stderr.strip() if result.stderr else "",
+            stdout=(result.stdout or "").rstrip(),
+            stderr=(result.stderr or "").rstrip(),
             return_code=result.return_code,
             success=result.return_code == 0
         )
 
 
+# Seconds between SSH keepalive packets on pooled connections
+SSH_KEEPALIVE_INTERVAL = 30
+
+
+class _LineWriter:
+    """File-like sink that hands complete lines to a callback."""
+
+    def __init__(self, on_line: Callable[[str], None]):
+        self._on_line = on_line
+        self._buffer = ""
+
+    def write(self, data: str) -> None:
+        self._buffer += data
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            self._on_line(line)
+
+    def flush(self) -> None:
+        pass
+
+    def flush_line(self) -> None:
+        """Emit any trailing partial line."""
+        if self._buffer:
+            self._on_line(self._buffer)
+            self._buffer = ""
+
+
 class SSHManager:
     """Manages SSH connections to VMs."""
 
-    def __init__(self):
+    def __init__(self, max_connections: int = 64):
         """Initialize SSH manager."""
-        self._connections: dict[str, Connection] = {}
+        # Pooled connections by (host, user, port, key fingerprint), least recently used first
+        self._connections: "OrderedDict[tuple, Connection]" = OrderedDict()
+        self._last_used: dict[tuple, float] = {}
+        # VM name -> pool key, so connections can still be closed by name
+        self._names: dict[str, tuple] = {}
+        self.max_connections = max_connections
+        # Guards the pool; VMs may be initialized from several threads
+        self._lock = threading.Lock()
+        # Parsed private keys by resolved path, validated against the file's mtime
+        self._keys: dict[Path, tuple[int, Any]] = {}
 
     def _load_key(self, key_path: Path):
-        """Load SSH private key from file."""
-        key_path = key_path.expanduser()
-        if not key_path.exists():
+        """Load SSH private key from file, reusing the parsed key while the file is unchanged."""
+        from paramiko import PKey
+
+        key_path = key_path.expanduser().resolve()
+        try:
+            mtime = key_path.stat().st_mtime_ns
+        except FileNotFoundError:
             raise FileNotFoundError(f"SSH key not found: {key_path}")
 
-        key_content = key_path.read_text()
+        cached = self._keys.get(key_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
 
-        # Try different key types
-        for key_class in [RSAKey, Ed25519Key, ECDSAKey]:
-            try:
-                return key_class.from_private_key(io.StringIO(key_content))
-            except Exception:
-                continue
+        # from_path detects the key type from the file instead of trial parsing
+        try:
+            key = PKey.from_path(key_path)
+        except Exception as e:
+            raise ValueError(f"Unable to load SSH key: {key_path}") from e
 
-        raise ValueError(f"Unable to load SSH key: {key_path}")
+        self._keys[key_path] = (mtime, key)
+        return key
 
-    def get_connection(self, vm: VMConfig) -> Connection:
-        """Get or create a connection to a VM."""
-        if vm.name not in self._connections:
+    def get_connection(self, vm: VMConfig) -> "Connection":
+        """Get or create a connection to a VM.
+
+        Connections are pooled by host, user, port and key, so VMConfigs that
+        point at the same login share one SSH session. The least recently used
+        connection is closed once more than max_connections are open.
+        """
+        evicted = []
+        with self._lock:
             key = self._load_key(vm.ssh_key_path)
-            self._connections[vm.name] = Connection(
-                host=vm.host,
-                user=vm.user,
-                connect_kwargs={"pkey": key}
-            )
-        return self._connections[vm.name]
+            pool_key = self._pool_key(vm, key)
+
+            conn = self._connections.get(pool_key)
+            if conn is None:
+                from fabric import Connection
+
+                # Fabric connects lazily, so this does no network I/O under the lock
+                conn = Connection(
+                    host=vm.host,
+                    user=vm.user,
+                    port=vm.ssh_port,
+                    connect_kwargs={"pkey": key, "banner_timeout": 10, "auth_timeout": 10}
+                )
+                self._connections[pool_key] = conn
+                while len(self._connections) > self.max_connections:
+                    evicted.append(self._discard(next(iter(self._connections))))
+            else:
+                self._connections.move_to_end(pool_key)
+
+            self._names[vm.name] = pool_key
+            self._last_used[pool_key] = time.monotonic()
+
+        for old in evicted:
+            self._close(old)
+        return conn
+
+    def _pool_key(self, vm: VMConfig, key=None) -> tuple:
+        """Get the key a VM's connection is pooled under (caller holds the lock)."""
+        if key is None:
+            key = self._load_key(vm.ssh_key_path)
+        return (vm.host, vm.user, vm.ssh_port, key.get_fingerprint())
+
+    def shares_connection(self, a: VMConfig, b: VMConfig) -> bool:
+        """Check whether two VMs would use the same pooled connection.
+
+        A Fabric Connection must not be used from two threads at once, so
+        callers use this to decide whether work on both VMs can overlap.
+        """
+        try:
+            with self._lock:
+                return self._pool_key(a) == self._pool_key(b)
+        except Exception:
+            return True  # Can't tell (e.g. unreadable key), so assume shared
+
+    def _discard(self, pool_key: tuple) -> "Connection":
+        """Remove a connection from the pool (caller holds the lock) and return it."""
+        self._last_used.pop(pool_key, None)
+        for name in [n for n, k in self._names.items() if k == pool_key]:
+            del self._names[name]
+        return self._connections.pop(pool_key)
+
+    def _close(self, conn: "Connection") -> None:
+        """Close a connection, ignoring errors."""
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _keepalive(self, conn: "Connection") -> None:
+        """Enable transport keepalives once a connection is open."""
+        if conn.transport is not None:
+            conn.transport.set_keepalive(SSH_KEEPALIVE_INTERVAL)
 
     def close_connection(self, vm_name: str) -> None:
-        """Close a specific connection."""
-        if vm_name in self._connections:
-            try:
-                self._connections[vm_name].close()
-            except Exception:
-                pass
-            del self._connections[vm_name]
+        """Release a VM's connection, closing it once no other VM name uses it."""
+        with self._lock:
+            pool_key = self._names.pop(vm_name, None)
+            if pool_key in self._names.values():
+                # Another VM entry shares this login; keep the session open
+                return
+            conn = self._discard(pool_key) if pool_key in self._connections else None
+        if conn is not None:
+            self._close(conn)
+
+    def close_idle(self, max_idle: float) -> int:
+        """Close connections unused for more than max_idle seconds; returns how many."""
+        cutoff = time.monotonic() - max_idle
+        with self._lock:
+            idle = [k for k, used in self._last_used.items() if used < cutoff]
+            conns = [self._discard(k) for k in idle]
+        for conn in conns:
+            self._close(conn)
+        return len(conns)
 
     def close_all(self) -> None:
         """Close all connections."""
-        for name in list(self._connections.keys()):
-            self.close_connection(name)
+        with self._lock:
+            conns = list(self._connections.values())
+            self._connections.clear()
+            self._last_used.clear()
+            self._names.clear()
+        for conn in conns:
+            self._close(conn)
 
     def run_command(
         self,
@@ -212,16 +364,52 @@ class SSHManager:
         conn = self.get_connection(vm)
         # Disable PTY and stdin to work in TUI environment
         result = conn.run(command, hide=hide, warn=warn, pty=False, in_stream=False)
+        self._keepalive(conn)
         return CommandResult.from_fabric_result(result)
 
-    def test_connection(self, vm: VMConfig) -> tuple[bool, str]:
-        """Test SSH connection to a VM."""
+    def run_command_streamed(
+        self,
+        vm: VMConfig,
+        command: str,
+        on_stdout: Callable[[str], None],
+        on_stderr: Optional[Callable[[str], None]] = None,
+    ) -> CommandResult:
+        """Execute a command on a VM, passing each output line to a callback as it arrives."""
+        conn = self.get_connection(vm)
+        out = _LineWriter(on_stdout)
+        err = _LineWriter(on_stderr or on_stdout)
         try:
-            result = self.run_command(vm, "echo 'Connection successful'")
-            if result.success:
-                return True, "Connection successful"
-            return False, result.stderr or "Unknown error"
+            result = conn.run(
+                command, warn=True, pty=False, in_stream=False,
+                out_stream=out, err_stream=err
+            )
+        finally:
+            out.flush_line()
+            err.flush_line()
+        self._keepalive(conn)
+        return CommandResult.from_fabric_result(result)
+
+    def test_connection(self, vm: VMConfig, deep: bool = False) -> tuple[bool, str]:
+        """Test SSH connection to a VM.
+
+        By default this only authenticates and round-trips an SSH ignore
+        packet; deep=True also runs a command in a remote shell.
+        """
+        try:
+            if deep:
+                result = self.run_command(vm, "echo 'Connection successful'")
+                if result.success:
+                    return True, "Connection successful"
+                return False, result.stderr or "Unknown error"
+
+            conn = self.get_connection(vm)
+            conn.open()
+            conn.transport.send_ignore()
+            self._keepalive(conn)
+            return True, "Connection successful"
         except Exception as e:
+            # Don't hand a broken session to the next caller
+            self.close_connection(vm.name)
             return False, str(e)
 
     def upload_file(
@@ -245,9 +433,28 @@ class SSHManager:
         remote_path: str
     ) -> bool:
         """Upload string content as a file to a VM."""
+        return self.upload_bytes(vm, content.encode("utf-8"), remote_path)
+
+    def upload_bytes(
+        self,
+        vm: VMConfig,
+        data: bytes,
+        remote_path: str
+    ) -> bool:
+        """Upload in-memory bytes as a file to a VM."""
+        return self.upload_many(vm, [(remote_path, data)])
+
+    def upload_many(
+        self,
+        vm: VMConfig,
+        files: list[tuple[str, bytes]]
+    ) -> bool:
+        """Upload several (remote_path, bytes) files over one SFTP session."""
         try:
-            conn = self.get_connection(vm)
-            conn.put(io.StringIO(content), remote_path)
+            sftp = self.get_connection(vm).sftp()
+            # Hand bytes to SFTP directly; putfo pipelines the writes
+            for remote_path, data in files:
+                sftp.putfo(io.BytesIO(data), remote_path, file_size=len(data))
             return True
         except Exception:
             return False
@@ -266,74 +473,131 @@ class SSHManager:
         except Exception:
             return False
 
+    def _stat_mode(self, vm: VMConfig, path: str) -> Optional[int]:
+        """Get a remote path's mode over the cached SFTP channel (None if missing)."""
+        try:
+            return self.get_connection(vm).sftp().stat(path).st_mode
+        except IOError:
+            return None
+
     def file_exists(self, vm: VMConfig, path: str) -> bool:
         """Check if a file exists on the VM."""
-        result = self.run_command(vm, f"test -f {path} && echo 'exists'")
-        return result.stdout == "exists"
+        mode = self._stat_mode(vm, path)
+        return mode is not None and stat.S_ISREG(mode)
 
     def dir_exists(self, vm: VMConfig, path: str) -> bool:
         """Check if a directory exists on the VM."""
-        result = self.run_command(vm, f"test -d {path} && echo 'exists'")
-        return result.stdout == "exists"
+        mode = self._stat_mode(vm, path)
+        return mode is not None and stat.S_ISDIR(mode)
+
+    def remove_file(self, vm: VMConfig, path: str) -> bool:
+        """Remove a file on the VM (a missing file counts as removed)."""
+        try:
+            self.get_connection(vm).sftp().remove(path)
+            return True
+        except FileNotFoundError:
+            return True
+        except Exception:
+            return False
+
+    def list_dir(self, vm: VMConfig, path: str) -> list[str]:
+        """List entry names in a remote directory (empty if missing)."""
+        try:
+            return self.get_connection(vm).sftp().listdir(path)
+        except IOError:
+            return []
 
     def mkdir(self, vm: VMConfig, path: str) -> bool:
-        """Create a directory on the VM."""
-        result = self.run_command(vm, f"mkdir -p {path}")
-        return result.success
+        """Create a directory (and missing parents) on the VM."""
+        if self.dir_exists(vm, path):
+            return True
+        try:
+            sftp = self.get_connection(vm).sftp()
+            try:
+                # Usually only the last component is missing
+                sftp.mkdir(path)
+                return True
+            except IOError:
+                pass
+
+            # Emulate mkdir -p: create each missing component in turn
+            current = "/" if path.startswith("/") else ""
+            for part in path.strip("/").split("/"):
+                current = f"{current}{part}/"
+                try:
+                    sftp.mkdir(current)
+                except IOError:
+                    # Already exists (or not permitted; checked below)
+                    pass
+            return self.dir_exists(vm, path)
+        except Exception:
+            return False
+
+
+# Printed before each batched setup step so progress can be reported live
+STEP_MARKER = "::DSM-STEP::"
+
+
+def _build_step_script(commands: list[str]) -> str:
+    """Join step commands into one script with a marker line before each step.
+
+    The marker starts with a newline so it lands on a line of its own even when
+    the previous step's output doesn't end in one (apt progress, curl -s, printf).
+    Each step runs in its own subshell so its exit status is judged exactly as a
+    separate command would be.
+    """
+    return "\n".join(
+        f"printf '\\n%s%d\\n' '{STEP_MARKER}' {i}\n( {command}\n) || exit $?"
+        for i, command in enumerate(commands)
+    )
 
 
 class VMInitializer:
     """Initialize VMs/LXCs with standard setup."""
 
-    SETUP_SCRIPT = '''#!/bin/bash
-set -e
-
-echo "=== System Update ==="
-apt update && DEBIAN_FRONTEND=noninteractive apt upgrade -y
-
-echo "=== Installing Base Packages ==="
-DEBIAN_FRONTEND=noninteractive apt install -y sudo curl wget git ca-certificates gnupg ufw
-
-echo "=== Creating User 'manager' ==="
-if ! id -u manager >/dev/null 2>&1; then
-    useradd -m -s /bin/bash -G sudo manager
-fi
-echo "manager ALL=(ALL) NOPASSWD:ALL" > /etc/sudoers.d/manager
-chmod 440 /etc/sudoers.d/manager
-
-echo "=== Setting up SSH Key ==="
-mkdir -p /home/manager/.ssh
-echo "{public_key}" > /home/manager/.ssh/authorized_keys
-chown -R manager:manager /home/manager/.ssh
-chmod 700 /home/manager/.ssh
-chmod 600 /home/manager/.ssh/authorized_keys
-
-echo "=== Locking Root Account ==="
-passwd -l root
-sed -i 's/^#*PermitRootLogin.*/PermitRootLogin no/' /etc/ssh/sshd_config
-sed -i 's/^#*PasswordAuthentication.*/PasswordAuthentication no/' /etc/ssh/sshd_config
-systemctl restart sshd
-
-echo "=== Configuring Firewall ==="
-ufw default deny incoming
-ufw default allow outgoing
-ufw allow 22/tcp comment 'SSH'
-ufw allow 80/tcp comment 'HTTP'
-ufw allow 443/tcp comment 'HTTPS'
-ufw --force enable
-
-echo "=== Installing Docker ==="
-if ! command -v docker &> /dev/null; then
-    curl -fsSL https://get.docker.com | sh
-fi
-usermod -aG docker manager
-
-echo "=== Verifying Docker ==="
-docker --version
-docker compose version
-
-echo "=== Setup Complete ==="
-'''
+    # (progress label, commands) for each setup step; {public_key} is filled in per VM
+    SETUP_STEPS = (
+        ("Updating system packages", "apt update && DEBIAN_FRONTEND=noninteractive apt upgrade -y"),
+        ("Installing base packages", "DEBIAN_FRONTEND=noninteractive apt install -y sudo curl wget git ca-certificates gnupg ufw"),
+        ("Creating 'manager' user", '''
+            if ! id -u manager >/dev/null 2>&1; then
+                useradd -m -s /bin/bash -G sudo manager
+            fi
+            echo "manager ALL=(ALL) NOPASSWD:ALL" > /etc/sudoers.d/manager
+            chmod 440 /etc/sudoers.d/manager
+        '''),
+        ("Setting up SSH key for manager", '''
+            mkdir -p /home/manager/.ssh
+            echo "{public_key}" > /home/manager/.ssh/authorized_keys
+            chown -R manager:manager /home/manager/.ssh
+            chmod 700 /home/manager/.ssh
+            chmod 600 /home/manager/.ssh/authorized_keys
+        '''),
+        ("Securing SSH configuration", '''
+            passwd -l root
+            sed -i 's/^#*PermitRootLogin.*/PermitRootLogin no/' /etc/ssh/sshd_config
+            sed -i 's/^#*PasswordAuthentication.*/PasswordAuthentication no/' /etc/ssh/sshd_config
+            systemctl restart sshd
+        '''),
+        ("Configuring firewall", '''
+            ufw default deny incoming
+            ufw default allow outgoing
+            ufw allow 22/tcp comment 'SSH'
+            ufw allow 80/tcp comment 'HTTP'
+            ufw allow 443/tcp comment 'HTTPS'
+            ufw --force enable
+        '''),
+        ("Installing Docker", '''
+            if ! command -v docker &> /dev/null; then
+                curl -fsSL https://get.docker.com | sh
+            fi
+            usermod -aG docker manager
+        '''),
+        ("Verifying Docker installation", "docker --version && docker compose version"),
+    )
+
+    # All steps as one script, built once; the markers drive the progress log
+    SETUP_SCRIPT = _build_step_script([command for _, command in SETUP_STEPS])
 
     def __init__(self, ssh_manager: "SSHManager"):
         """Initialize with SSH manager."""
@@ -398,68 +662,45 @@ echo "=== Setup Complete ==="
             except Exception as e:
                 return False, Path(), f"Failed to connect as root: {e}"
 
-            # Run setup steps individually for better logging
-            steps = [
-                ("Updating system packages", "apt update && DEBIAN_FRONTEND=noninteractive apt upgrade -y"),
-                ("Installing base packages", "DEBIAN_FRONTEND=noninteractive apt install -y sudo curl wget git ca-certificates gnupg ufw"),
-                ("Creating 'manager' user", '''
-                    if ! id -u manager >/dev/null 2>&1; then
-                        useradd -m -s /bin/bash -G sudo manager
-                    fi
-                    echo "manager ALL=(ALL) NOPASSWD:ALL" > /etc/sudoers.d/manager
-                    chmod 440 /etc/sudoers.d/manager
-                '''),
-                ("Setting up SSH key for manager", f'''
-                    mkdir -p /home/manager/.ssh
-                    echo "{public_key}" > /home/manager/.ssh/authorized_keys
-                    chown -R manager:manager /home/manager/.ssh
-                    chmod 700 /home/manager/.ssh
-                    chmod 600 /home/manager/.ssh/authorized_keys
-                '''),
-                ("Securing SSH configuration", '''
-                    passwd -l root
-                    sed -i 's/^#*PermitRootLogin.*/PermitRootLogin no/' /etc/ssh/sshd_config
-                    sed -i 's/^#*PasswordAuthentication.*/PasswordAuthentication no/' /etc/ssh/sshd_config
-                    systemctl restart sshd
-                '''),
-                ("Configuring firewall", '''
-                    ufw default deny incoming
-                    ufw default allow outgoing
-                    ufw allow 22/tcp comment 'SSH'
-                    ufw allow 80/tcp comment 'HTTP'
-                    ufw allow 443/tcp comment 'HTTPS'
-                    ufw --force enable
-                '''),
-                ("Installing Docker", '''
-                    if ! command -v docker &> /dev/null; then
-                        curl -fsSL https://get.docker.com | sh
-                    fi
-                    usermod -aG docker manager
-                '''),
-                ("Verifying Docker installation", "docker --version && docker compose version"),
-            ]
-
-            for step_name, command in steps:
-                log(f"→ {step_name}...")
-                result = self.ssh.run_command(root_vm, command)
-
-                # Log detailed output if callback provided
-                if result.stdout:
-                    for line in result.stdout.split('\n'):
-                        if line.strip():
-                            log_detail(f"  {line}")
-                if result.stderr:
-                    for line in result.stderr.split('\n'):
-                        if line.strip():
-                            log_detail(f"  [stderr] {line}")
-
-                if not result.success:
-                    # Close root connection
-                    self.ssh.close_connection(root_vm.name)
-                    log(f"✗ {step_name} failed")
-                    log_detail(f"Exit code: {result.return_code}")
-                    return False, private_path, f"{step_name} failed:\n{result.stderr}\n{result.stdout}"
-                log(f"✓ {step_name}")
+            # Run all steps in one SSH exec
+            steps = self.SETUP_STEPS
+            script = self.SETUP_SCRIPT.format(public_key=public_key)
+            current = -1
+            stdout_lines: list[str] = []
+            stderr_lines: list[str] = []
+
+            def on_stdout(line: str):
+                nonlocal current
+                if line.startswith(STEP_MARKER):
+                    if current >= 0:
+                        log(f"✓ {steps[current][0]}")
+                    current = int(line[len(STEP_MARKER):])
+                    log(f"→ {steps[current][0]}...")
+                    # Keep only the current step's output for the error message
+                    stdout_lines.clear()
+                    stderr_lines.clear()
+                    return
+                stdout_lines.append(line)
+                if line.strip():
+                    log_detail(f"  {line}")
+
+            def on_stderr(line: str):
+                stderr_lines.append(line)
+                if line.strip():
+                    log_detail(f"  [stderr] {line}")
+
+            result = self.ssh.run_command_streamed(root_vm, script, on_stdout, on_stderr)
+
+            if not result.success:
+                # Close root connection
+                self.ssh.close_connection(root_vm.name)
+                step_name = steps[current][0] if current >= 0 else "Setup"
+                log(f"✗ {step_name} failed")
+                log_detail(f"Exit code: {result.return_code}")
+                stdout = "\n".join(stdout_lines).strip()
+                stderr = "\n".join(stderr_lines).strip()
+                return False, private_path, f"{step_name} failed:\n{stderr}\n{stdout}"
+            log(f"✓ {steps[current][0]}")
 
             # Close root connection
             self.ssh.close_connection(root_vm.name)
@@ -487,6 +728,53 @@ echo "=== Setup Complete ==="
         except Exception as e:
             return False, Path(), f"Initialization failed: {e}"
 
+    def initialize_vms(
+        self,
+        hosts: list[tuple[str, Path, str]],
+        callback: Optional[Callable[[str], None]] = None,
+        detail_callback: Optional[Callable[[str], None]] = None,
+        port: int = 22,
+        max_workers: int = 16,
+    ) -> dict[str, tuple[bool, Path, str]]:
+        """Initialize several VMs concurrently.
+
+        Args:
+            hosts: (host, root_key_path, vm_name) per VM
+            callback: Progress callback; called from worker threads, so it
+                must be thread-safe. Lines are prefixed with the VM name.
+            detail_callback: Detailed output callback (same rules as callback)
+            port: SSH port
+            max_workers: Maximum VMs initialized at once
+
+        Returns:
+            Mapping of vm_name to initialize_vm's (success, manager_key_path, message)
+        """
+        if not hosts:
+            return {}
+
+        def prefixed(cb: Optional[Callable[[str], None]], vm_name: str):
+            if cb is None:
+                return None
+            return lambda msg: cb(f"[{vm_name}] {msg}")
+
+        results: dict[str, tuple[bool, Path, str]] = {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(hosts))) as executor:
+            futures = {
+                executor.submit(
+                    self.initialize_vm,
+                    host,
+                    root_key_path,
+                    vm_name,
+                    prefixed(callback, vm_name),
+                    prefixed(detail_callback, vm_name),
+                    port,
+                ): vm_name
+                for host, root_key_path, vm_name in hosts
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        return results
+
     def run_setup_step(
         self,
         vm: VMConfig,
@@ -520,22 +808,30 @@ echo "=== Setup Complete ==="
             return False, result.stderr
 
 
-# Global SSH manager instance
+# Global SSH manager instances (created on first call)
 _ssh_manager: Optional[SSHManager] = None
-_vm_initializer: Optional[VMInitializer] = None
+_ssh_manager_lock = threading.Lock()
 
 
 def get_ssh_manager() -> SSHManager:
     """Get or create the global SSH manager instance."""
     global _ssh_manager
     if _ssh_manager is None:
-        _ssh_manager = SSHManager()
+        with _ssh_manager_lock:
+            if _ssh_manager is None:
+                _ssh_manager = SSHManager()
     return _ssh_manager
 
 
+_vm_initializer: Optional[VMInitializer] = None
+_vm_initializer_lock = threading.Lock()
+
+
 def get_vm_initializer() -> VMInitializer:
     """Get or create the global VM initializer instance."""
     global _vm_initializer
     if _vm_initializer is None:
-        _vm_initializer = VMInitializer(get_ssh_manager())
+        with _vm_initializer_lock:
+            if _vm_initializer is None:
+                _vm_initializer = VMInitializer(get_ssh_manager())
     return _vm_initializer
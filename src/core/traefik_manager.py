@@ -1,10 +1,22 @@
 """Traefik configuration and deployment manager."""
 
+import io
+import shlex
+import tarfile
+import threading
+import time
+import uuid
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
 
 import yaml
 
+try:
+    from yaml import CSafeDumper as _YamlDumper
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeDumper as _YamlDumper
+
 from .config_loader import Settings, VMConfig, get_config_loader
 from .docker_manager import DockerManager, get_docker_manager
 from .ssh_manager import SSHManager, get_ssh_manager
@@ -14,6 +26,182 @@ TRAEFIK_BASE_PATH = "/opt/traefik"
 TRAEFIK_DYNAMIC_PATH = f"{TRAEFIK_BASE_PATH}/dynamic"
 
 
+def _dump_yaml(config: dict) -> str:
+    """Serialize a config dict in insertion order, inlining leaf lists and maps."""
+    return yaml.dump(config, Dumper=_YamlDumper, default_flow_style=None, sort_keys=False)
+
+
+def _build_tar(files: dict[str, str]) -> bytes:
+    """Pack relative path -> text content into an in-memory tar archive."""
+    buffer = io.BytesIO()
+    mtime = time.time()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for name, content in files.items():
+            data = content.encode("utf-8")
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = mtime
+            info.mode = 0o644
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+_DOCKER_COMPOSE = """version: '3.8'
+
+services:
+  traefik:
+    image: traefik:v3.2
+    container_name: traefik
+    restart: unless-stopped
+    ports:
+      - "80:80"
+      - "443:443"
+    volumes:
+      - {base}/traefik.yml:/etc/traefik/traefik.yml:ro
+      - {dynamic}:/etc/traefik/dynamic:ro
+      - {base}/acme.json:/acme.json
+    networks:
+      - traefik-public
+
+networks:
+  traefik-public:
+    external: true
+""".format(
+    base=TRAEFIK_BASE_PATH,
+    dynamic=TRAEFIK_DYNAMIC_PATH
+)
+
+
+@lru_cache(maxsize=8)
+def _static_config_yaml(dashboard_enabled: bool, email: str, staging: bool) -> str:
+    """Render the Traefik static configuration (cached per input)."""
+    config = {
+        "api": {
+            "dashboard": dashboard_enabled,
+            "insecure": False
+        },
+        "entryPoints": {
+            "web": {
+                "address": ":80",
+                "http": {
+                    "redirections": {
+                        "entryPoint": {
+                            "to": "websecure",
+                            "scheme": "https"
+                        }
+                    }
+                }
+            },
+            "websecure": {
+                "address": ":443"
+            }
+        },
+        "providers": {
+            "file": {
+                "directory": TRAEFIK_DYNAMIC_PATH,
+                "watch": True
+            }
+        },
+        "certificatesResolvers": {
+            "letsencrypt": {
+                "acme": {
+                    "email": email,
+                    "storage": f"{TRAEFIK_BASE_PATH}/acme.json",
+                    "httpChallenge": {
+                        "entryPoint": "web"
+                    }
+                }
+            }
+        },
+        "log": {
+            "level": "INFO"
+        },
+        "accessLog": {}
+    }
+
+    # Use staging server if configured
+    if staging:
+        config["certificatesResolvers"]["letsencrypt"]["acme"]["caServer"] = \
+            "https://acme-staging-v02.api.letsencrypt.org/directory"
+
+    return _dump_yaml(config)
+
+
+@lru_cache(maxsize=8)
+def _dashboard_config_yaml(subdomain: str, domain: str, auth: str) -> str:
+    """Render the dashboard dynamic configuration (cached per input)."""
+    config = {
+        "http": {
+            "routers": {
+                "dashboard": {
+                    "rule": f"Host(`{subdomain}.{domain}`)",
+                    "service": "api@internal",
+                    "tls": {
+                        "certResolver": "letsencrypt"
+                    },
+                    "middlewares": ["dashboard-auth"]
+                }
+            },
+            "middlewares": {
+                "dashboard-auth": {
+                    "basicAuth": {
+                        "users": [auth]
+                    }
+                }
+            }
+        }
+    }
+
+    return _dump_yaml(config)
+
+
+@lru_cache(maxsize=256)
+def _service_config_yaml(
+    name: str,
+    subdomain: str,
+    domain: str,
+    target_host: str,
+    target_port: int,
+    https: bool,
+    middlewares: tuple[str, ...]
+) -> str:
+    """Render the dynamic configuration for one service route (cached per input)."""
+    config = {
+        "http": {
+            "routers": {
+                name: {
+                    "rule": f"Host(`{subdomain}.{domain}`)",
+                    "service": name,
+                }
+            },
+            "services": {
+                name: {
+                    "loadBalancer": {
+                        "servers": [
+                            {"url": f"http://{target_host}:{target_port}"}
+                        ]
+                    }
+                }
+            }
+        }
+    }
+
+    # Add TLS configuration
+    if https:
+        config["http"]["routers"][name]["tls"] = {
+            "certResolver": "letsencrypt"
+        }
+        config["http"]["routers"][name]["entryPoints"] = ["websecure"]
+    else:
+        config["http"]["routers"][name]["entryPoints"] = ["web"]
+
+    # Add middlewares if specified
+    if middlewares:
+        config["http"]["routers"][name]["middlewares"] = list(middlewares)
+
+    return _dump_yaml(config)
+
+
 @dataclass
 class ServiceRoute:
     """A route configuration for a service."""
@@ -50,150 +238,63 @@ class TraefikManager:
             raise ValueError("No Traefik VM configured. Add a VM with role 'traefik'.")
         return traefik_vm
 
+    def _extract_files(
+        self,
+        vm: VMConfig,
+        files: dict[str, str],
+        target: str,
+        before: str = "",
+        after: str = ""
+    ) -> tuple[bool, str]:
+        """Upload files as one tar and unpack them into target with a single exec.
+
+        The archive gets a unique name so concurrent deploys don't clobber each
+        other, and is removed however the command ends.
+        """
+        # Generated name, only [a-z0-9-], so it needs no quoting inside the trap
+        archive = f"/tmp/dsm-{uuid.uuid4().hex}.tar"
+        if not self.ssh.upload_bytes(vm, _build_tar(files), archive):
+            self.ssh.remove_file(vm, archive)
+            return False, "Failed to upload configuration archive"
+
+        result = self.ssh.run_command(
+            vm,
+            f"trap 'rm -f {archive}' EXIT; "
+            f"{before}tar -xf {archive} --no-same-owner -C {shlex.quote(target)}{after}"
+        )
+        return result.success, result.stderr
+
     def _generate_static_config(self, settings: Settings) -> str:
         """Generate Traefik static configuration."""
-        config = {
-            "api": {
-                "dashboard": settings.traefik.dashboard_enabled,
-                "insecure": False
-            },
-            "entryPoints": {
-                "web": {
-                    "address": ":80",
-                    "http": {
-                        "redirections": {
-                            "entryPoint": {
-                                "to": "websecure",
-                                "scheme": "https"
-                            }
-                        }
-                    }
-                },
-                "websecure": {
-                    "address": ":443"
-                }
-            },
-            "providers": {
-                "file": {
-                    "directory": TRAEFIK_DYNAMIC_PATH,
-                    "watch": True
-                }
-            },
-            "certificatesResolvers": {
-                "letsencrypt": {
-                    "acme": {
-                        "email": settings.email,
-                        "storage": f"{TRAEFIK_BASE_PATH}/acme.json",
-                        "httpChallenge": {
-                            "entryPoint": "web"
-                        }
-                    }
-                }
-            },
-            "log": {
-                "level": "INFO"
-            },
-            "accessLog": {}
-        }
-
-        # Use staging server if configured
-        if settings.ssl.staging:
-            config["certificatesResolvers"]["letsencrypt"]["acme"]["caServer"] = \
-                "https://acme-staging-v02.api.letsencrypt.org/directory"
-
-        return yaml.dump(config, default_flow_style=False)
+        return _static_config_yaml(
+            settings.traefik.dashboard_enabled,
+            settings.email,
+            settings.ssl.staging
+        )
 
     def _generate_dashboard_config(self, settings: Settings) -> str:
         """Generate Traefik dashboard dynamic configuration."""
-        subdomain = settings.traefik.dashboard_subdomain
-        domain = settings.domain
-
-        config = {
-            "http": {
-                "routers": {
-                    "dashboard": {
-                        "rule": f"Host(`{subdomain}.{domain}`)",
-                        "service": "api@internal",
-                        "tls": {
-                            "certResolver": "letsencrypt"
-                        },
-                        "middlewares": ["dashboard-auth"]
-                    }
-                },
-                "middlewares": {
-                    "dashboard-auth": {
-                        "basicAuth": {
-                            "users": [settings.traefik.dashboard_auth]
-                        }
-                    }
-                }
-            }
-        }
-
-        return yaml.dump(config, default_flow_style=False)
+        return _dashboard_config_yaml(
+            settings.traefik.dashboard_subdomain,
+            settings.domain,
+            settings.traefik.dashboard_auth
+        )
 
     def _generate_docker_compose(self) -> str:
         """Generate Traefik docker-compose.yml."""
-        return f"""version: '3.8'
-
-services:
-  traefik:
-    image: traefik:v3.2
-    container_name: traefik
-    restart: unless-stopped
-    ports:
-      - "80:80"
-      - "443:443"
-    volumes:
-      - {TRAEFIK_BASE_PATH}/traefik.yml:/etc/traefik/traefik.yml:ro
-      - {TRAEFIK_DYNAMIC_PATH}:/etc/traefik/dynamic:ro
-      - {TRAEFIK_BASE_PATH}/acme.json:/acme.json
-    networks:
-      - traefik-public
-
-networks:
-  traefik-public:
-    external: true
-"""
+        return _DOCKER_COMPOSE
 
     def generate_service_config(self, route: ServiceRoute, settings: Settings) -> str:
         """Generate dynamic configuration for a service route."""
-        domain = settings.domain
-
-        config = {
-            "http": {
-                "routers": {
-                    route.name: {
-                        "rule": f"Host(`{route.subdomain}.{domain}`)",
-                        "service": route.name,
-                    }
-                },
-                "services": {
-                    route.name: {
-                        "loadBalancer": {
-                            "servers": [
-                                {"url": f"http://{route.target_host}:{route.target_port}"}
-                            ]
-                        }
-                    }
-                }
-            }
-        }
-
-        # Add TLS configuration
-        if route.https:
-            config["http"]["routers"][route.name]["tls"] = {
-                "certResolver": "letsencrypt"
-            }
-            config["http"]["routers"][route.name]["entryPoints"] = ["websecure"]
-        else:
-            config["http"]["routers"][route.name]["entryPoints"] = ["web"]
-
-        # Add middlewares if specified
-        if route.middlewares:
-            config["http"]["routers"][route.name]["middlewares"] = route.middlewares
-
-        return yaml.dump(config, default_flow_style=False)
+        return _service_config_yaml(
+            route.name,
+            route.subdomain,
+            settings.domain,
+            route.target_host,
+            route.target_port,
+            route.https,
+            tuple(route.middlewares)
+        )
 
     def deploy_traefik(self) -> tuple[bool, str]:
         """Deploy Traefik on the Traefik VM."""
@@ -201,37 +302,32 @@ networks:
             vm = self._get_traefik_vm()
             settings = self.config_loader.load_settings()
 
-            # Create directories
-            self.ssh.run_command(vm, f"mkdir -p {TRAEFIK_BASE_PATH} {TRAEFIK_DYNAMIC_PATH}")
-
-            # Create network if not exists
-            self.ssh.run_command(
-                vm,
-                "docker network create traefik-public 2>/dev/null || true"
-            )
+            files = {"docker-compose.yml": self._generate_docker_compose()}
+            if settings.traefik.dashboard_enabled and settings.traefik.dashboard_auth:
+                # dynamic/ is mounted as a directory, so a replaced file is picked up
+                files["dynamic/dashboard.yml"] = self._generate_dashboard_config(settings)
 
-            # Create acme.json with correct permissions
-            self.ssh.run_command(
+            # Directories, configs, acme.json and network in one upload and one exec
+            base = shlex.quote(TRAEFIK_BASE_PATH)
+            success, error = self._extract_files(
                 vm,
-                f"touch {TRAEFIK_BASE_PATH}/acme.json && chmod 600 {TRAEFIK_BASE_PATH}/acme.json"
+                files,
+                TRAEFIK_BASE_PATH,
+                before=f"mkdir -p {shlex.quote(TRAEFIK_DYNAMIC_PATH)} && ",
+                after=(
+                    f" && touch {base}/acme.json && chmod 600 {base}/acme.json"
+                    " && { docker network create traefik-public >/dev/null 2>&1 || true; }"
+                )
             )
+            if not success:
+                return False, error or "Failed to prepare Traefik directory"
 
-            # Upload static config
+            # traefik.yml is bind-mounted as a single file, so it must be
+            # rewritten in place: tar would give it a new inode that the
+            # running container never sees
             static_config = self._generate_static_config(settings)
-            self.ssh.upload_content(vm, static_config, f"{TRAEFIK_BASE_PATH}/traefik.yml")
-
-            # Upload dashboard config
-            if settings.traefik.dashboard_enabled and settings.traefik.dashboard_auth:
-                dashboard_config = self._generate_dashboard_config(settings)
-                self.ssh.upload_content(
-                    vm,
-                    dashboard_config,
-                    f"{TRAEFIK_DYNAMIC_PATH}/dashboard.yml"
-                )
-
-            # Upload docker-compose
-            compose = self._generate_docker_compose()
-            self.ssh.upload_content(vm, compose, f"{TRAEFIK_BASE_PATH}/docker-compose.yml")
+            if not self.ssh.upload_content(vm, static_config, f"{TRAEFIK_BASE_PATH}/traefik.yml"):
+                return False, "Failed to upload traefik.yml"
 
             # Start Traefik
             success, output = self.docker.compose_up(vm, TRAEFIK_BASE_PATH)
@@ -244,19 +340,48 @@ networks:
 
     def add_service_route(self, route: ServiceRoute) -> tuple[bool, str]:
         """Add a service route to Traefik configuration."""
+        return self.add_service_routes([route])[0]
+
+    def add_service_routes(self, routes: list[ServiceRoute]) -> list[tuple[bool, str]]:
+        """Add several service routes with a single upload."""
+        if not routes:
+            return []
         try:
             vm = self._get_traefik_vm()
             settings = self.config_loader.load_settings()
 
-            # Generate and upload config
-            config = self.generate_service_config(route, settings)
-            config_path = f"{TRAEFIK_DYNAMIC_PATH}/{route.name}.yml"
-            self.ssh.upload_content(vm, config, config_path)
-
-            return True, f"Route added: {route.subdomain}.{settings.domain}"
+            configs = {
+                f"{route.name}.yml": self.generate_service_config(route, settings)
+                for route in routes
+            }
+            if len(configs) == 1:
+                # A single file needs no archive or extraction step
+                (name, config), = configs.items()
+                if not self.ssh.upload_content(vm, config, f"{TRAEFIK_DYNAMIC_PATH}/{name}"):
+                    raise IOError("Failed to upload route configuration")
+            else:
+                # Traefik's file provider watches the directory, so one untar
+                # picks up every route without a reload
+                success, error = self._extract_files(vm, configs, TRAEFIK_DYNAMIC_PATH)
+                if not success:
+                    raise IOError(error or "Failed to extract route configuration")
+
+            return [
+                (True, f"Route added: {route.subdomain}.{settings.domain}")
+                for route in routes
+            ]
 
         except Exception as e:
-            return False, str(e)
+            return [(False, str(e))] * len(routes)
+
+    def route_exists(self, service_name: str) -> bool:
+        """Check if a service route config exists (True if it can't be checked)."""
+        try:
+            vm = self._get_traefik_vm()
+            return self.ssh.file_exists(vm, f"{TRAEFIK_DYNAMIC_PATH}/{service_name}.yml")
+        except Exception:
+            # Err on the side of "exists" so callers never remove a route they can't see
+            return True
 
     def remove_service_route(self, service_name: str) -> tuple[bool, str]:
         """Remove a service route from Traefik configuration."""
@@ -264,10 +389,9 @@ networks:
             vm = self._get_traefik_vm()
             config_path = f"{TRAEFIK_DYNAMIC_PATH}/{service_name}.yml"
 
-            result = self.ssh.run_command(vm, f"rm -f {config_path}")
-            if result.success:
+            if self.ssh.remove_file(vm, config_path):
                 return True, f"Route removed: {service_name}"
-            return False, result.stderr
+            return False, f"Failed to remove {config_path}"
 
         except Exception as e:
             return False, str(e)
@@ -276,18 +400,12 @@ networks:
         """List all configured service routes."""
         try:
             vm = self._get_traefik_vm()
-            result = self.ssh.run_command(vm, f"ls -1 {TRAEFIK_DYNAMIC_PATH}/*.yml 2>/dev/null")
-
-            if result.success and result.stdout:
-                routes = []
-                for line in result.stdout.split('\n'):
-                    if line.strip():
-                        # Extract service name from path
-                        name = line.split('/')[-1].replace('.yml', '')
-                        if name != 'dashboard':  # Exclude dashboard
-                            routes.append(name)
-                return routes
-            return []
+            entries = self.ssh.list_dir(vm, TRAEFIK_DYNAMIC_PATH)
+            # Service name is the file name; the dashboard config is not a route
+            return sorted(
+                entry[:-4] for entry in entries
+                if entry.endswith(".yml") and entry != "dashboard.yml"
+            )
 
         except Exception:
             return []
@@ -326,13 +444,16 @@ networks:
             return str(e)
 
 
-# Global Traefik manager instance
+# Global Traefik manager instance (created on first call)
 _traefik_manager: Optional[TraefikManager] = None
+_traefik_manager_lock = threading.Lock()
 
 
 def get_traefik_manager() -> TraefikManager:
     """Get or create the global Traefik manager instance."""
     global _traefik_manager
     if _traefik_manager is None:
-        _traefik_manager = TraefikManager()
+        with _traefik_manager_lock:
+            if _traefik_manager is None:
+                _traefik_manager = TraefikManager()
     return _traefik_manager
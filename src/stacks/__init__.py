@@ -4,6 +4,7 @@ from .base import (
     BaseStack,
     StackConfig,
     StackInfo,
+    deploy_many,
     get_available_stacks,
     get_stack,
     get_stack_class,
@@ -14,6 +15,7 @@ __all__ = [
     "BaseStack",
     "StackConfig",
     "StackInfo",
+    "deploy_many",
     "get_available_stacks",
     "get_stack",
     "get_stack_class",
@@ -1,8 +1,13 @@
 """Base stack class and stack registry."""
 
+import shlex
+import threading
 from abc import ABC, abstractmethod
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Optional
+from types import MappingProxyType
+from typing import ClassVar, Optional
 
 from ..core.config_loader import VMConfig, Settings, get_config_loader
 from ..core.docker_manager import DockerManager, get_docker_manager
@@ -12,8 +17,12 @@ from ..core.traefik_manager import TraefikManager, ServiceRoute, get_traefik_man
 
 STACKS_BASE_PATH = "/opt/stacks"
 
+# Per-thread route batch set up by deploy_many; deploy queues its route there
+# instead of writing it, so only the caller's own deploys are batched
+_route_batch = threading.local()
 
-@dataclass
+
+@dataclass(slots=True)
 class StackConfig:
     """Configuration for a stack deployment."""
     subdomain: str
@@ -22,16 +31,22 @@ class StackConfig:
     port: int = 0  # Internal port for Traefik routing
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class StackInfo:
     """Information about a stack."""
     name: str
     display_name: str
     description: str
     default_port: int
-    required_env_vars: list[str]
-    optional_env_vars: dict[str, str]  # name -> default value
-    dependencies: list[str] = field(default_factory=list)
+    required_env_vars: Sequence[str]
+    optional_env_vars: Mapping[str, str]  # name -> default value
+    dependencies: Sequence[str] = ()
+
+    def __post_init__(self):
+        # Shared class-level metadata, so the collections are made read-only too
+        object.__setattr__(self, "required_env_vars", tuple(self.required_env_vars))
+        object.__setattr__(self, "optional_env_vars", MappingProxyType(dict(self.optional_env_vars)))
+        object.__setattr__(self, "dependencies", tuple(self.dependencies))
 
 
 class BaseStack(ABC):
@@ -49,11 +64,13 @@ class BaseStack(ABC):
         self.traefik = traefik_manager or get_traefik_manager()
         self.config_loader = get_config_loader()
 
+    # Stack metadata, declared once at class scope by each definition
+    INFO: ClassVar[StackInfo]
+
     @property
-    @abstractmethod
     def info(self) -> StackInfo:
         """Return stack information."""
-        pass
+        return self.INFO
 
     @abstractmethod
     def generate_compose(self, config: StackConfig) -> str:
@@ -62,14 +79,12 @@ class BaseStack(ABC):
 
     def get_stack_path(self, vm: VMConfig) -> str:
         """Get the path where this stack will be deployed."""
-        return f"{STACKS_BASE_PATH}/{self.info.name}"
+        return f"{STACKS_BASE_PATH}/{self.INFO.name}"
 
     def validate_config(self, config: StackConfig) -> tuple[bool, str]:
         """Validate stack configuration."""
-        missing = []
-        for var in self.info.required_env_vars:
-            if var not in config.env_vars or not config.env_vars[var]:
-                missing.append(var)
+        env = config.env_vars
+        missing = [var for var in self.INFO.required_env_vars if not env.get(var)]
 
         if missing:
             return False, f"Missing required environment variables: {', '.join(missing)}"
@@ -79,6 +94,24 @@ class BaseStack(ABC):
 
         return True, "Configuration valid"
 
+    def _record_deployment(self, vm: VMConfig, deployed: bool) -> None:
+        """Add or remove this stack in the VM's stack list (vms.yaml is only rewritten on change)."""
+        vm_config = self.config_loader.load_vms().get_vm_by_name(vm.name)
+        if vm_config is None:
+            return
+        name = self.INFO.name
+        if deployed and name not in vm_config.stacks:
+            self.config_loader.update_vm_stacks(vm.name, vm_config.stacks + [name])
+        elif not deployed and name in vm_config.stacks:
+            self.config_loader.update_vm_stacks(
+                vm.name, [s for s in vm_config.stacks if s != name]
+            )
+
+    def _start_stack(self, vm: VMConfig, stack_path: str) -> tuple[bool, str]:
+        """Pull images and start the stack."""
+        self.docker.compose_pull(vm, stack_path)
+        return self.docker.compose_up(vm, stack_path)
+
     def deploy(
         self,
         vm: VMConfig,
@@ -97,53 +130,72 @@ class BaseStack(ABC):
             self.ssh.mkdir(vm, stack_path)
 
             # Fill in optional env vars with defaults
-            for var, default in self.info.optional_env_vars.items():
-                if var not in config.env_vars:
-                    config.env_vars[var] = default
+            for var, default in self.INFO.optional_env_vars.items():
+                config.env_vars.setdefault(var, default)
 
             # Set port if not specified
             if config.port == 0:
-                config.port = self.info.default_port
+                config.port = self.INFO.default_port
 
-            # Generate and upload docker-compose
-            compose_content = self.generate_compose(config)
-            compose_path = f"{stack_path}/docker-compose.yml"
-            self.ssh.upload_content(vm, compose_content, compose_path)
-
-            # Generate .env file if there are env vars
+            # Upload docker-compose and .env (if there are env vars) together
+            files = [(
+                f"{stack_path}/docker-compose.yml",
+                self.generate_compose(config).encode("utf-8")
+            )]
             if config.env_vars:
                 env_content = "\n".join(f"{k}={v}" for k, v in config.env_vars.items())
-                env_path = f"{stack_path}/.env"
-                self.ssh.upload_content(vm, env_content, env_path)
-
-            # Pull images
-            self.docker.compose_pull(vm, stack_path)
+                files.append((f"{stack_path}/.env", env_content.encode("utf-8")))
+            if not self.ssh.upload_many(vm, files):
+                return False, "Failed to upload stack files"
 
-            # Start stack
-            success, output = self.docker.compose_up(vm, stack_path)
-            if not success:
-                return False, f"Failed to start stack: {output}"
-
-            # Add Traefik route
             settings = self.config_loader.load_settings()
             route = ServiceRoute(
-                name=self.info.name,
+                name=self.INFO.name,
                 subdomain=config.subdomain,
                 target_host=vm.host,
                 target_port=config.port
             )
-            route_success, route_msg = self.traefik.add_service_route(route)
+            batch = getattr(_route_batch, "routes", None)
+            if batch is not None:
+                # deploy_many writes the routes, then records the stack or
+                # replaces this result if its route failed
+                success, output = self._start_stack(vm, stack_path)
+                if not success:
+                    return False, f"Failed to start stack: {output}"
+                batch.append((self, route))
+                return True, f"Stack deployed: {config.subdomain}.{settings.domain}"
+
+            traefik_vm = self.config_loader.load_vms().get_traefik_vm()
+            if (
+                traefik_vm is not None
+                and not self.ssh.shares_connection(vm, traefik_vm)
+                and not self.traefik.route_exists(route.name)
+            ):
+                # The route is new and lives on another VM, so write it while
+                # this VM pulls images and starts the stack
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    route_future = executor.submit(self.traefik.add_service_route, route)
+                    success, output = self._start_stack(vm, stack_path)
+                    route_success, route_msg = route_future.result()
+
+                if not success:
+                    if route_success:
+                        self.traefik.remove_service_route(route.name)
+                    return False, f"Failed to start stack: {output}"
+            else:
+                # A redeploy must not replace the working route before the
+                # stack is up, and a shared SSH connection can't be used from
+                # two threads, so go one step at a time
+                success, output = self._start_stack(vm, stack_path)
+                if not success:
+                    return False, f"Failed to start stack: {output}"
+                route_success, route_msg = self.traefik.add_service_route(route)
+
             if not route_success:
                 return False, f"Stack started but Traefik route failed: {route_msg}"
 
             # Update VM stacks in config
-            vms = self.config_loader.load_vms()
-            for v in vms.vms:
-                if v.name == vm.name:
-                    if self.info.name not in v.stacks:
-                        v.stacks.append(self.info.name)
-                    break
-            self.config_loader.save_vms(vms)
+            self._record_deployment(vm, deployed=True)
 
             return True, f"Stack deployed: {config.subdomain}.{settings.domain}"
 
@@ -159,20 +211,14 @@ class BaseStack(ABC):
             success, output = self.docker.compose_down(vm, stack_path, remove_volumes=remove_data)
 
             # Remove Traefik route
-            self.traefik.remove_service_route(self.info.name)
+            self.traefik.remove_service_route(self.INFO.name)
 
             # Remove stack directory if removing data
             if remove_data:
-                self.ssh.run_command(vm, f"rm -rf {stack_path}")
+                self.ssh.run_command(vm, f"rm -rf {shlex.quote(stack_path)}")
 
             # Update VM stacks in config
-            vms = self.config_loader.load_vms()
-            for v in vms.vms:
-                if v.name == vm.name:
-                    if self.info.name in v.stacks:
-                        v.stacks.remove(self.info.name)
-                    break
-            self.config_loader.save_vms(vms)
+            self._record_deployment(vm, deployed=False)
 
             return True, "Stack removed successfully"
 
@@ -201,15 +247,22 @@ class BaseStack(ABC):
         stack_path = self.get_stack_path(vm)
         return self.docker.compose_logs(vm, stack_path, tail)
 
-    def restart(self, vm: VMConfig) -> tuple[bool, str]:
-        """Restart the stack."""
+    def restart(self, vm: VMConfig, force: bool = False) -> tuple[bool, str]:
+        """Restart the stack.
+
+        force=True tears the containers down and recreates them, which is
+        needed to pick up changes to docker-compose.yml or .env.
+        """
         stack_path = self.get_stack_path(vm)
 
         try:
-            # Stop
-            self.docker.compose_down(vm, stack_path)
-            # Start
-            success, output = self.docker.compose_up(vm, stack_path)
+            if force:
+                # Stop
+                self.docker.compose_down(vm, stack_path)
+                # Start
+                success, output = self.docker.compose_up(vm, stack_path)
+            else:
+                success, output = self.docker.compose_restart(vm, stack_path)
             if success:
                 return True, "Stack restarted"
             return False, output
@@ -220,28 +273,72 @@ class BaseStack(ABC):
 
 # Stack registry
 _stack_registry: dict[str, type[BaseStack]] = {}
+_stack_instances: dict[str, BaseStack] = {}
 
 
 def register_stack(stack_class: type[BaseStack]) -> type[BaseStack]:
     """Decorator to register a stack class."""
-    # Create temporary instance to get info
-    instance = stack_class()
-    _stack_registry[instance.info.name] = stack_class
+    name = stack_class.INFO.name
+    _stack_registry[name] = stack_class
+    _stack_instances.pop(name, None)
     return stack_class
 
 
 def get_available_stacks() -> dict[str, StackInfo]:
     """Get all available stacks."""
-    return {name: cls().info for name, cls in _stack_registry.items()}
+    return {name: cls.INFO for name, cls in _stack_registry.items()}
 
 
 def get_stack(name: str) -> Optional[BaseStack]:
-    """Get a stack instance by name."""
-    if name in _stack_registry:
-        return _stack_registry[name]()
-    return None
+    """Get a stack instance by name.
+
+    Stacks only hold references to the shared managers, so one instance per
+    name is created and reused.
+    """
+    stack = _stack_instances.get(name)
+    if stack is None:
+        stack_class = _stack_registry.get(name)
+        if stack_class is None:
+            return None
+        stack = _stack_instances[name] = stack_class()
+    return stack
 
 
 def get_stack_class(name: str) -> Optional[type[BaseStack]]:
     """Get a stack class by name."""
     return _stack_registry.get(name)
+
+
+def deploy_many(
+    vm: VMConfig,
+    deployments: list[tuple[BaseStack, StackConfig]]
+) -> list[tuple[bool, str]]:
+    """Deploy several stacks to a VM, uploading their Traefik routes as one batch.
+
+    A stack is only recorded as deployed once its route has been written.
+    """
+    if getattr(_route_batch, "routes", None) is not None:
+        raise RuntimeError("deploy_many is already running on this thread")
+
+    batch: list[tuple[BaseStack, ServiceRoute]] = []
+    results = []
+    _route_batch.routes = batch
+    try:
+        for stack, config in deployments:
+            results.append(stack.deploy(vm, config))
+    finally:
+        _route_batch.routes = None
+
+    route_results = dict(zip(
+        (stack for stack, _ in batch),
+        get_traefik_manager().add_service_routes([route for _, route in batch])
+    ))
+    for i, (stack, _) in enumerate(deployments):
+        if stack not in route_results or not results[i][0]:
+            continue
+        route_success, route_msg = route_results[stack]
+        if route_success:
+            stack._record_deployment(vm, deployed=True)
+        else:
+            results[i] = (False, f"Stack started but Traefik route failed: {route_msg}")
+    return results
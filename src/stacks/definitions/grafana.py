@@ -3,29 +3,7 @@
 from ..base import BaseStack, StackConfig, StackInfo, register_stack
 
 
-@register_stack
-class GrafanaStack(BaseStack):
-    """Grafana visualization and monitoring stack."""
-
-    @property
-    def info(self) -> StackInfo:
-        return StackInfo(
-            name="grafana",
-            display_name="Grafana",
-            description="Visualization and monitoring platform",
-            default_port=3000,
-            required_env_vars=[
-                "GF_SECURITY_ADMIN_PASSWORD",
-            ],
-            optional_env_vars={
-                "GF_SECURITY_ADMIN_USER": "admin",
-                "GF_USERS_ALLOW_SIGN_UP": "false",
-                "GF_SERVER_ROOT_URL": "",
-            },
-        )
-
-    def generate_compose(self, config: StackConfig) -> str:
-        return f"""version: '3.8'
+_COMPOSE_TEMPLATE = """version: '3.8'
 
 services:
   grafana:
@@ -33,7 +11,7 @@ services:
     container_name: grafana
     restart: unless-stopped
     ports:
-      - "{config.port}:3000"
+      - "{port}:3000"
     environment:
       - GF_SECURITY_ADMIN_USER=${{GF_SECURITY_ADMIN_USER}}
       - GF_SECURITY_ADMIN_PASSWORD=${{GF_SECURITY_ADMIN_PASSWORD}}
@@ -47,3 +25,26 @@ volumes:
   grafana-data:
   grafana-provisioning:
 """
+
+
+@register_stack
+class GrafanaStack(BaseStack):
+    """Grafana visualization and monitoring stack."""
+
+    INFO = StackInfo(
+        name="grafana",
+        display_name="Grafana",
+        description="Visualization and monitoring platform",
+        default_port=3000,
+        required_env_vars=[
+            "GF_SECURITY_ADMIN_PASSWORD",
+        ],
+        optional_env_vars={
+            "GF_SECURITY_ADMIN_USER": "admin",
+            "GF_USERS_ALLOW_SIGN_UP": "false",
+            "GF_SERVER_ROOT_URL": "",
+        },
+    )
+
+    def generate_compose(self, config: StackConfig) -> str:
+        return _COMPOSE_TEMPLATE.format(port=config.port)
@@ -3,28 +3,7 @@
 from ..base import BaseStack, StackConfig, StackInfo, register_stack
 
 
-@register_stack
-class HemmeligStack(BaseStack):
-    """Hemmelig secret sharing stack."""
-
-    @property
-    def info(self) -> StackInfo:
-        return StackInfo(
-            name="hemmelig",
-            display_name="Hemmelig",
-            description="Self-hosted secret sharing service",
-            default_port=3000,
-            required_env_vars=[
-                "SECRET_MASTER_KEY",
-            ],
-            optional_env_vars={
-                "SECRET_MAX_TEXT_SIZE": "256",
-                "RATE_LIMIT_ENABLED": "true",
-            },
-        )
-
-    def generate_compose(self, config: StackConfig) -> str:
-        return f"""version: '3.8'
+_COMPOSE_TEMPLATE = """version: '3.8'
 
 services:
   hemmelig:
@@ -32,7 +11,7 @@ services:
     container_name: hemmelig
     restart: unless-stopped
     ports:
-      - "{config.port}:3000"
+      - "{port}:3000"
     environment:
       - SECRET_MASTER_KEY=${{SECRET_MASTER_KEY}}
       - SECRET_MAX_TEXT_SIZE=${{SECRET_MAX_TEXT_SIZE}}
@@ -43,3 +22,25 @@ services:
 volumes:
   hemmelig-data:
 """
+
+
+@register_stack
+class HemmeligStack(BaseStack):
+    """Hemmelig secret sharing stack."""
+
+    INFO = StackInfo(
+        name="hemmelig",
+        display_name="Hemmelig",
+        description="Self-hosted secret sharing service",
+        default_port=3000,
+        required_env_vars=[
+            "SECRET_MASTER_KEY",
+        ],
+        optional_env_vars={
+            "SECRET_MAX_TEXT_SIZE": "256",
+            "RATE_LIMIT_ENABLED": "true",
+        },
+    )
+
+    def generate_compose(self, config: StackConfig) -> str:
+        return _COMPOSE_TEMPLATE.format(port=config.port)
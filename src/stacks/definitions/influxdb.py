@@ -3,31 +3,7 @@
 from ..base import BaseStack, StackConfig, StackInfo, register_stack
 
 
-@register_stack
-class InfluxDBStack(BaseStack):
-    """InfluxDB v2 time series database stack."""
-
-    @property
-    def info(self) -> StackInfo:
-        return StackInfo(
-            name="influxdb",
-            display_name="InfluxDB v2",
-            description="Time series database for metrics and events",
-            default_port=8086,
-            required_env_vars=[
-                "DOCKER_INFLUXDB_INIT_USERNAME",
-                "DOCKER_INFLUXDB_INIT_PASSWORD",
-                "DOCKER_INFLUXDB_INIT_ORG",
-                "DOCKER_INFLUXDB_INIT_BUCKET",
-            ],
-            optional_env_vars={
-                "DOCKER_INFLUXDB_INIT_MODE": "setup",
-                "DOCKER_INFLUXDB_INIT_RETENTION": "0",
-            },
-        )
-
-    def generate_compose(self, config: StackConfig) -> str:
-        return f"""version: '3.8'
+_COMPOSE_TEMPLATE = """version: '3.8'
 
 services:
   influxdb:
@@ -35,7 +11,7 @@ services:
     container_name: influxdb
     restart: unless-stopped
     ports:
-      - "{config.port}:8086"
+      - "{port}:8086"
     environment:
       - DOCKER_INFLUXDB_INIT_MODE=${{DOCKER_INFLUXDB_INIT_MODE}}
       - DOCKER_INFLUXDB_INIT_USERNAME=${{DOCKER_INFLUXDB_INIT_USERNAME}}
@@ -51,3 +27,28 @@ volumes:
   influxdb-data:
   influxdb-config:
 """
+
+
+@register_stack
+class InfluxDBStack(BaseStack):
+    """InfluxDB v2 time series database stack."""
+
+    INFO = StackInfo(
+        name="influxdb",
+        display_name="InfluxDB v2",
+        description="Time series database for metrics and events",
+        default_port=8086,
+        required_env_vars=[
+            "DOCKER_INFLUXDB_INIT_USERNAME",
+            "DOCKER_INFLUXDB_INIT_PASSWORD",
+            "DOCKER_INFLUXDB_INIT_ORG",
+            "DOCKER_INFLUXDB_INIT_BUCKET",
+        ],
+        optional_env_vars={
+            "DOCKER_INFLUXDB_INIT_MODE": "setup",
+            "DOCKER_INFLUXDB_INIT_RETENTION": "0",
+        },
+    )
+
+    def generate_compose(self, config: StackConfig) -> str:
+        return _COMPOSE_TEMPLATE.format(port=config.port)
@@ -1,28 +1,11 @@
 """MQTT (Mosquitto) stack definition."""
 
-from ..base import BaseStack, StackConfig, StackInfo, register_stack
+import shlex
 
+from ..base import BaseStack, StackConfig, StackInfo, register_stack
 
-@register_stack
-class MQTTStack(BaseStack):
-    """Eclipse Mosquitto MQTT broker stack."""
 
-    @property
-    def info(self) -> StackInfo:
-        return StackInfo(
-            name="mqtt",
-            display_name="Mosquitto MQTT",
-            description="Lightweight MQTT message broker",
-            default_port=1883,
-            required_env_vars=[],  # Basic setup needs no env vars
-            optional_env_vars={
-                "MQTT_USER": "",
-                "MQTT_PASSWORD": "",
-            },
-        )
-
-    def generate_compose(self, config: StackConfig) -> str:
-        return f"""version: '3.8'
+_COMPOSE_TEMPLATE = """version: '3.8'
 
 services:
   mosquitto:
@@ -30,7 +13,7 @@ services:
     container_name: mosquitto
     restart: unless-stopped
     ports:
-      - "{config.port}:1883"      # MQTT
+      - "{port}:1883"      # MQTT
       - "9001:9001"               # WebSocket
     volumes:
       - mosquitto-data:/mosquitto/data
@@ -43,6 +26,26 @@ volumes:
   mosquitto-config:
 """
 
+
+@register_stack
+class MQTTStack(BaseStack):
+    """Eclipse Mosquitto MQTT broker stack."""
+
+    INFO = StackInfo(
+        name="mqtt",
+        display_name="Mosquitto MQTT",
+        description="Lightweight MQTT message broker",
+        default_port=1883,
+        required_env_vars=[],  # Basic setup needs no env vars
+        optional_env_vars={
+            "MQTT_USER": "",
+            "MQTT_PASSWORD": "",
+        },
+    )
+
+    def generate_compose(self, config: StackConfig) -> str:
+        return _COMPOSE_TEMPLATE.format(port=config.port)
+
     def deploy(self, vm, config):
         """Deploy MQTT with custom mosquitto.conf."""
         # First deploy normally
@@ -65,25 +68,21 @@ protocol websockets
 allow_anonymous false
 password_file /mosquitto/config/passwd
 """
-            self.ssh.upload_content(
-                vm,
-                mosquitto_conf,
-                f"{stack_path}/mosquitto.conf"
-            )
 
             # Create password file (mosquitto_passwd format)
             # Note: In production, use proper hashing
             passwd_content = f"{mqtt_user}:{mqtt_pass}"
-            self.ssh.upload_content(vm, passwd_content, f"{stack_path}/passwd")
+
+            self.ssh.upload_many(vm, [
+                (f"{stack_path}/mosquitto.conf", mosquitto_conf.encode("utf-8")),
+                (f"{stack_path}/passwd", passwd_content.encode("utf-8")),
+            ])
 
             # Copy config into container volume
             self.ssh.run_command(
                 vm,
-                f"docker cp {stack_path}/mosquitto.conf mosquitto:/mosquitto/config/mosquitto.conf"
-            )
-            self.ssh.run_command(
-                vm,
-                f"docker cp {stack_path}/passwd mosquitto:/mosquitto/config/passwd"
+                f"docker cp {shlex.quote(stack_path + '/mosquitto.conf')} mosquitto:/mosquitto/config/mosquitto.conf"
+                f" && docker cp {shlex.quote(stack_path + '/passwd')} mosquitto:/mosquitto/config/passwd"
             )
 
             # Restart to apply config
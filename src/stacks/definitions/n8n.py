@@ -3,32 +3,7 @@
 from ..base import BaseStack, StackConfig, StackInfo, register_stack
 
 
-@register_stack
-class N8NStack(BaseStack):
-    """n8n workflow automation stack."""
-
-    @property
-    def info(self) -> StackInfo:
-        return StackInfo(
-            name="n8n",
-            display_name="n8n",
-            description="Workflow automation platform",
-            default_port=5678,
-            required_env_vars=[
-                "N8N_BASIC_AUTH_USER",
-                "N8N_BASIC_AUTH_PASSWORD",
-            ],
-            optional_env_vars={
-                "N8N_BASIC_AUTH_ACTIVE": "true",
-                "N8N_HOST": "localhost",
-                "N8N_PROTOCOL": "https",
-                "GENERIC_TIMEZONE": "Europe/Berlin",
-                "N8N_ENCRYPTION_KEY": "",
-            },
-        )
-
-    def generate_compose(self, config: StackConfig) -> str:
-        return f"""version: '3.8'
+_COMPOSE_TEMPLATE = """version: '3.8'
 
 services:
   n8n:
@@ -36,7 +11,7 @@ services:
     container_name: n8n
     restart: unless-stopped
     ports:
-      - "{config.port}:5678"
+      - "{port}:5678"
     environment:
       - N8N_BASIC_AUTH_ACTIVE=${{N8N_BASIC_AUTH_ACTIVE}}
       - N8N_BASIC_AUTH_USER=${{N8N_BASIC_AUTH_USER}}
@@ -45,10 +20,36 @@ services:
       - N8N_PROTOCOL=${{N8N_PROTOCOL}}
       - N8N_ENCRYPTION_KEY=${{N8N_ENCRYPTION_KEY}}
       - GENERIC_TIMEZONE=${{GENERIC_TIMEZONE}}
-      - WEBHOOK_URL=https://{config.subdomain}.${{DOMAIN}}/
+      - WEBHOOK_URL=https://{subdomain}.${{DOMAIN}}/
     volumes:
       - n8n-data:/home/node/.n8n
 
 volumes:
   n8n-data:
 """
+
+
+@register_stack
+class N8NStack(BaseStack):
+    """n8n workflow automation stack."""
+
+    INFO = StackInfo(
+        name="n8n",
+        display_name="n8n",
+        description="Workflow automation platform",
+        default_port=5678,
+        required_env_vars=[
+            "N8N_BASIC_AUTH_USER",
+            "N8N_BASIC_AUTH_PASSWORD",
+        ],
+        optional_env_vars={
+            "N8N_BASIC_AUTH_ACTIVE": "true",
+            "N8N_HOST": "localhost",
+            "N8N_PROTOCOL": "https",
+            "GENERIC_TIMEZONE": "Europe/Berlin",
+            "N8N_ENCRYPTION_KEY": "",
+        },
+    )
+
+    def generate_compose(self, config: StackConfig) -> str:
+        return _COMPOSE_TEMPLATE.format(port=config.port, subdomain=config.subdomain)
@@ -3,34 +3,7 @@
 from ..base import BaseStack, StackConfig, StackInfo, register_stack
 
 
-@register_stack
-class NetboxStack(BaseStack):
-    """Netbox DCIM/IPAM stack."""
-
-    @property
-    def info(self) -> StackInfo:
-        return StackInfo(
-            name="netbox",
-            display_name="Netbox",
-            description="Data center infrastructure management (DCIM) and IPAM",
-            default_port=8000,
-            required_env_vars=[
-                "SUPERUSER_NAME",
-                "SUPERUSER_EMAIL",
-                "SUPERUSER_PASSWORD",
-                "SECRET_KEY",
-            ],
-            optional_env_vars={
-                "ALLOWED_HOST": "*",
-                "DB_NAME": "netbox",
-                "DB_USER": "netbox",
-                "DB_PASSWORD": "netbox",
-                "REDIS_PASSWORD": "netbox",
-            },
-        )
-
-    def generate_compose(self, config: StackConfig) -> str:
-        return f"""version: '3.8'
+_COMPOSE_TEMPLATE = """version: '3.8'
 
 services:
   netbox:
@@ -38,7 +11,7 @@ services:
     container_name: netbox
     restart: unless-stopped
     ports:
-      - "{config.port}:8080"
+      - "{port}:8080"
     environment:
       - SUPERUSER_NAME=${{SUPERUSER_NAME}}
       - SUPERUSER_EMAIL=${{SUPERUSER_EMAIL}}
@@ -85,3 +58,31 @@ volumes:
   netbox-postgres-data:
   netbox-redis-data:
 """
+
+
+@register_stack
+class NetboxStack(BaseStack):
+    """Netbox DCIM/IPAM stack."""
+
+    INFO = StackInfo(
+        name="netbox",
+        display_name="Netbox",
+        description="Data center infrastructure management (DCIM) and IPAM",
+        default_port=8000,
+        required_env_vars=[
+            "SUPERUSER_NAME",
+            "SUPERUSER_EMAIL",
+            "SUPERUSER_PASSWORD",
+            "SECRET_KEY",
+        ],
+        optional_env_vars={
+            "ALLOWED_HOST": "*",
+            "DB_NAME": "netbox",
+            "DB_USER": "netbox",
+            "DB_PASSWORD": "netbox",
+            "REDIS_PASSWORD": "netbox",
+        },
+    )
+
+    def generate_compose(self, config: StackConfig) -> str:
+        return _COMPOSE_TEMPLATE.format(port=config.port)
@@ -3,30 +3,7 @@
 from ..base import BaseStack, StackConfig, StackInfo, register_stack
 
 
-@register_stack
-class OdooStack(BaseStack):
-    """Odoo ERP/CRM stack."""
-
-    @property
-    def info(self) -> StackInfo:
-        return StackInfo(
-            name="odoo",
-            display_name="Odoo",
-            description="Open source ERP and CRM platform",
-            default_port=8069,
-            required_env_vars=[
-                "POSTGRES_PASSWORD",
-            ],
-            optional_env_vars={
-                "POSTGRES_USER": "odoo",
-                "POSTGRES_DB": "postgres",
-                "ODOO_EMAIL": "admin@example.com",
-                "ODOO_PASSWORD": "admin",
-            },
-        )
-
-    def generate_compose(self, config: StackConfig) -> str:
-        return f"""version: '3.8'
+_COMPOSE_TEMPLATE = """version: '3.8'
 
 services:
   odoo:
@@ -34,7 +11,7 @@ services:
     container_name: odoo
     restart: unless-stopped
     ports:
-      - "{config.port}:8069"
+      - "{port}:8069"
       - "8072:8072"
     environment:
       - HOST=odoo-db
@@ -65,3 +42,27 @@ volumes:
   odoo-addons:
   odoo-db-data:
 """
+
+
+@register_stack
+class OdooStack(BaseStack):
+    """Odoo ERP/CRM stack."""
+
+    INFO = StackInfo(
+        name="odoo",
+        display_name="Odoo",
+        description="Open source ERP and CRM platform",
+        default_port=8069,
+        required_env_vars=[
+            "POSTGRES_PASSWORD",
+        ],
+        optional_env_vars={
+            "POSTGRES_USER": "odoo",
+            "POSTGRES_DB": "postgres",
+            "ODOO_EMAIL": "admin@example.com",
+            "ODOO_PASSWORD": "admin",
+        },
+    )
+
+    def generate_compose(self, config: StackConfig) -> str:
+        return _COMPOSE_TEMPLATE.format(port=config.port)
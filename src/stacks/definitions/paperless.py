@@ -3,34 +3,7 @@
 from ..base import BaseStack, StackConfig, StackInfo, register_stack
 
 
-@register_stack
-class PaperlessStack(BaseStack):
-    """Paperless-ngx document management stack."""
-
-    @property
-    def info(self) -> StackInfo:
-        return StackInfo(
-            name="paperless",
-            display_name="Paperless-ngx",
-            description="Document management system with OCR",
-            default_port=8000,
-            required_env_vars=[
-                "PAPERLESS_ADMIN_USER",
-                "PAPERLESS_ADMIN_PASSWORD",
-                "PAPERLESS_SECRET_KEY",
-            ],
-            optional_env_vars={
-                "PAPERLESS_OCR_LANGUAGE": "deu+eng",
-                "PAPERLESS_TIME_ZONE": "Europe/Berlin",
-                "PAPERLESS_CONSUMER_POLLING": "30",
-                "PAPERLESS_CONSUMER_RECURSIVE": "true",
-                "PAPERLESS_DBHOST": "paperless-db",
-                "PAPERLESS_REDIS": "redis://paperless-redis:6379",
-            },
-        )
-
-    def generate_compose(self, config: StackConfig) -> str:
-        return f"""version: '3.8'
+_COMPOSE_TEMPLATE = """version: '3.8'
 
 services:
   paperless:
@@ -38,7 +11,7 @@ services:
     container_name: paperless
     restart: unless-stopped
     ports:
-      - "{config.port}:8000"
+      - "{port}:8000"
     environment:
       - PAPERLESS_ADMIN_USER=${{PAPERLESS_ADMIN_USER}}
       - PAPERLESS_ADMIN_PASSWORD=${{PAPERLESS_ADMIN_PASSWORD}}
@@ -103,3 +76,31 @@ volumes:
   paperless-pgdata:
   paperless-redisdata:
 """
+
+
+@register_stack
+class PaperlessStack(BaseStack):
+    """Paperless-ngx document management stack."""
+
+    INFO = StackInfo(
+        name="paperless",
+        display_name="Paperless-ngx",
+        description="Document management system with OCR",
+        default_port=8000,
+        required_env_vars=[
+            "PAPERLESS_ADMIN_USER",
+            "PAPERLESS_ADMIN_PASSWORD",
+            "PAPERLESS_SECRET_KEY",
+        ],
+        optional_env_vars={
+            "PAPERLESS_OCR_LANGUAGE": "deu+eng",
+            "PAPERLESS_TIME_ZONE": "Europe/Berlin",
+            "PAPERLESS_CONSUMER_POLLING": "30",
+            "PAPERLESS_CONSUMER_RECURSIVE": "true",
+            "PAPERLESS_DBHOST": "paperless-db",
+            "PAPERLESS_REDIS": "redis://paperless-redis:6379",
+        },
+    )
+
+    def generate_compose(self, config: StackConfig) -> str:
+        return _COMPOSE_TEMPLATE.format(port=config.port)
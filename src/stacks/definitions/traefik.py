@@ -1,7 +1,7 @@
 """Traefik reverse proxy stack definition."""
 
 from ..base import BaseStack, StackConfig, StackInfo, register_stack
-from ...core.config_loader import VMConfig, get_config_loader
+from ...core.config_loader import VMConfig
 from ...core.traefik_manager import get_traefik_manager
 
 
@@ -9,16 +9,14 @@ from ...core.traefik_manager import get_traefik_manager
 class TraefikStack(BaseStack):
     """Traefik reverse proxy stack."""
 
-    @property
-    def info(self) -> StackInfo:
-        return StackInfo(
-            name="traefik",
-            display_name="Traefik (Reverse Proxy)",
-            description="Reverse proxy with automatic SSL certificates. Deploy on Traefik VM only.",
-            default_port=443,
-            required_env_vars=[],
-            optional_env_vars={},
-        )
+    INFO = StackInfo(
+        name="traefik",
+        display_name="Traefik (Reverse Proxy)",
+        description="Reverse proxy with automatic SSL certificates. Deploy on Traefik VM only.",
+        default_port=443,
+        required_env_vars=[],
+        optional_env_vars={},
+    )
 
     def generate_compose(self, config: StackConfig) -> str:
         """Traefik uses its own compose generation via TraefikManager."""
@@ -45,16 +43,9 @@ class TraefikStack(BaseStack):
 
         if success:
             # Update VM stacks in config
-            config_loader = get_config_loader()
-            vms = config_loader.load_vms()
-            for v in vms.vms:
-                if v.name == vm.name:
-                    if self.info.name not in v.stacks:
-                        v.stacks.append(self.info.name)
-                    break
-            config_loader.save_vms(vms)
-
-            settings = config_loader.load_settings()
+            self._record_deployment(vm, deployed=True)
+
+            settings = self.config_loader.load_settings()
             dashboard_url = f"https://{settings.traefik.dashboard_subdomain}.{settings.domain}"
             return True, f"Traefik deployed! Dashboard: {dashboard_url}"
 
@@ -70,14 +61,7 @@ class TraefikStack(BaseStack):
                 self.ssh.run_command(vm, "rm -rf /opt/traefik")
 
             # Update VM stacks in config
-            config_loader = get_config_loader()
-            vms = config_loader.load_vms()
-            for v in vms.vms:
-                if v.name == vm.name:
-                    if self.info.name in v.stacks:
-                        v.stacks.remove(self.info.name)
-                    break
-            config_loader.save_vms(vms)
+            self._record_deployment(vm, deployed=False)
 
             return True, "Traefik removed successfully"
 
@@ -3,30 +3,7 @@
 from ..base import BaseStack, StackConfig, StackInfo, register_stack
 
 
-@register_stack
-class VaultwardenStack(BaseStack):
-    """Vaultwarden (Bitwarden-compatible) password manager stack."""
-
-    @property
-    def info(self) -> StackInfo:
-        return StackInfo(
-            name="vaultwarden",
-            display_name="Vaultwarden",
-            description="Self-hosted Bitwarden-compatible password manager",
-            default_port=8080,
-            required_env_vars=[
-                "ADMIN_TOKEN",
-            ],
-            optional_env_vars={
-                "SIGNUPS_ALLOWED": "false",
-                "INVITATIONS_ALLOWED": "true",
-                "SHOW_PASSWORD_HINT": "false",
-                "WEBSOCKET_ENABLED": "true",
-            },
-        )
-
-    def generate_compose(self, config: StackConfig) -> str:
-        return f"""version: '3.8'
+_COMPOSE_TEMPLATE = """version: '3.8'
 
 services:
   vaultwarden:
@@ -34,8 +11,8 @@ services:
     container_name: vaultwarden
     restart: unless-stopped
     ports:
-      - "{config.port}:80"
-      - "{config.port + 1}:3012"
+      - "{port}:80"
+      - "{websocket_port}:3012"
     environment:
       - ADMIN_TOKEN=${{ADMIN_TOKEN}}
       - SIGNUPS_ALLOWED=${{SIGNUPS_ALLOWED}}
@@ -48,3 +25,27 @@ services:
 volumes:
   vaultwarden-data:
 """
+
+
+@register_stack
+class VaultwardenStack(BaseStack):
+    """Vaultwarden (Bitwarden-compatible) password manager stack."""
+
+    INFO = StackInfo(
+        name="vaultwarden",
+        display_name="Vaultwarden",
+        description="Self-hosted Bitwarden-compatible password manager",
+        default_port=8080,
+        required_env_vars=[
+            "ADMIN_TOKEN",
+        ],
+        optional_env_vars={
+            "SIGNUPS_ALLOWED": "false",
+            "INVITATIONS_ALLOWED": "true",
+            "SHOW_PASSWORD_HINT": "false",
+            "WEBSOCKET_ENABLED": "true",
+        },
+    )
+
+    def generate_compose(self, config: StackConfig) -> str:
+        return _COMPOSE_TEMPLATE.format(port=config.port, websocket_port=config.port + 1)
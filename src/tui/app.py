@@ -4,6 +4,7 @@ from textual.app import App, ComposeResult
 from textual.binding import Binding
 from textual.widgets import Footer, Header
 
+from ..core.ssh_manager import get_ssh_manager
 from .screens.dashboard import DashboardScreen
 from .screens.vm_manager import VMManagerScreen
 from .screens.stack_deploy import StackDeployScreen
@@ -219,4 +220,8 @@ class DockerStackManager(App):
 def run_app():
     """Run the TUI application."""
     app = DockerStackManager()
-    app.run()
+    try:
+        app.run()
+    finally:
+        # Close pooled SSH connections on exit
+        get_ssh_manager().close_all()
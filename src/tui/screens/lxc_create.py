@@ -18,6 +18,7 @@ from textual.worker import Worker, WorkerState
 from ..base_screen import BaseScreen
 from ...core.config_loader import get_config_loader
 from ...core.lxc_manager import LXCCreationConfig, LXCCreationResult, get_lxc_manager
+from ...core.network_utils import is_valid_hostname, is_valid_ipv4
 from ...core.proxmox_api import ProxmoxAPIError
 from ...core.ssh_manager import get_vm_initializer
 
@@ -433,6 +434,8 @@ class LXCCreateScreen(BaseScreen):
 
         if not hostname:
             return False, "Hostname is required"
+        if not is_valid_hostname(hostname):
+            return False, "Invalid hostname"
         if not ip:
             return False, "IP address is required"
         if not node:
@@ -450,14 +453,7 @@ class LXCCreateScreen(BaseScreen):
                 return False, "VMID must be a number"
 
         # Validate IP format
-        try:
-            parts = ip.split(".")
-            if len(parts) != 4:
-                raise ValueError()
-            for p in parts:
-                if not 0 <= int(p) <= 255:
-                    raise ValueError()
-        except (ValueError, AttributeError):
+        if not is_valid_ipv4(ip):
             return False, "Invalid IP address format"
 
         # Check if IP is already used
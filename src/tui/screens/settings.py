@@ -25,6 +25,8 @@ from ...core.config_loader import (
     SSLConfig,
     TraefikConfig,
 )
+from ...core.lxc_manager import get_lxc_manager
+from ...core.network_utils import is_ip_in_subnet, netmask_to_prefix, prefix_to_netmask
 from ...core.proxmox_api import ProxmoxAPI, ProxmoxAPIError
 
 
@@ -362,6 +364,7 @@ class SettingsScreen(BaseScreen):
                     Checkbox("Unprivileged Container", id="lxc-unprivileged", value=True),
                     Checkbox("Start on Boot", id="lxc-onboot", value=True),
                     Checkbox("Enable Nesting (for Docker)", id="lxc-nesting", value=True),
+                    Checkbox("Shared Bootstrap SSH Key", id="lxc-shared-key", value=False),
                     id="section-proxmox",
                     classes="settings-section",
                 ),
@@ -449,38 +452,18 @@ class SettingsScreen(BaseScreen):
     def _calculate_netmask_from_prefix(self, prefix: str) -> str:
         """Calculate netmask from CIDR prefix."""
         try:
-            prefix_int = int(prefix)
-            if 0 <= prefix_int <= 32:
-                netmask_int = (0xFFFFFFFF << (32 - prefix_int)) & 0xFFFFFFFF
-                return f"{(netmask_int >> 24) & 0xFF}.{(netmask_int >> 16) & 0xFF}.{(netmask_int >> 8) & 0xFF}.{netmask_int & 0xFF}"
+            return prefix_to_netmask(int(prefix))
         except (ValueError, TypeError):
-            pass
-        return "255.255.255.0"
+            return "255.255.255.0"
 
     def _calculate_prefix_from_netmask(self, netmask: str) -> str:
         """Calculate CIDR prefix from netmask."""
-        try:
-            parts = netmask.split(".")
-            if len(parts) == 4:
-                netmask_int = (int(parts[0]) << 24) + (int(parts[1]) << 16) + (int(parts[2]) << 8) + int(parts[3])
-                # Count the number of 1 bits
-                prefix = bin(netmask_int).count("1")
-                # Validate it's a valid netmask (contiguous 1s followed by 0s)
-                expected = (0xFFFFFFFF << (32 - prefix)) & 0xFFFFFFFF
-                if netmask_int == expected:
-                    return str(prefix)
-        except (ValueError, TypeError):
-            pass
-        return ""
+        prefix = netmask_to_prefix(netmask)
+        return "" if prefix is None else str(prefix)
 
     def _is_ip_in_subnet(self, ip: str, subnet_ip: str, prefix: str) -> bool:
         """Check if an IP address is within the subnet."""
-        try:
-            import ipaddress
-            network = ipaddress.ip_network(f"{subnet_ip}/{prefix}", strict=False)
-            return ipaddress.ip_address(ip) in network
-        except (ValueError, TypeError):
-            return False
+        return is_ip_in_subnet(ip, subnet_ip, prefix)
 
     def _validate_ip_in_subnet(self, ip: str, field_name: str) -> bool:
         """Validate IP is in subnet and show error if not."""
@@ -590,6 +573,7 @@ class SettingsScreen(BaseScreen):
             self.query_one("#lxc-disk", Input).value = str(lxc.rootfs_size)
             self.query_one("#lxc-unprivileged", Checkbox).value = lxc.unprivileged
             self.query_one("#lxc-onboot", Checkbox).value = lxc.start_on_boot
+            self.query_one("#lxc-shared-key", Checkbox).value = lxc.shared_bootstrap_key
             self.query_one("#lxc-nesting", Checkbox).value = "nesting" in lxc.features
 
             # OPNsense settings
@@ -615,40 +599,39 @@ class SettingsScreen(BaseScreen):
             settings = config_loader.load_settings()
             pve = settings.proxmox
 
-            api = ProxmoxAPI(
+            with ProxmoxAPI(
                 host=pve.host,
                 port=pve.port,
                 user=pve.user,
                 token_name=pve.token_name,
                 token_value=pve.token_value,
                 verify_ssl=pve.verify_ssl,
-            )
+            ) as api:
+                # Load nodes
+                self.nodes = api.get_nodes()
+                node_options = [(n["node"], n["node"]) for n in self.nodes]
+                node_select = self.query_one("#pve-default-node", Select)
+                node_select.set_options(node_options)
+                if pve.default_node:
+                    node_select.value = pve.default_node
+                elif self.nodes:
+                    node_select.value = self.nodes[0]["node"]
+
+                # Load storage
+                node = pve.default_node or (self.nodes[0]["node"] if self.nodes else None)
+                if node:
+                    self.storages = api.get_storage_list(node)
+                    storage_options = [(s["storage"], s["storage"]) for s in self.storages]
+                    self.query_one("#pve-default-storage", Select).set_options(storage_options)
+                    self.query_one("#pve-template-storage", Select).set_options(storage_options)
+
+                    if pve.default_storage:
+                        self.query_one("#pve-default-storage", Select).value = pve.default_storage
+                    if pve.template_storage:
+                        self.query_one("#pve-template-storage", Select).value = pve.template_storage
 
-            # Load nodes
-            self.nodes = api.get_nodes()
-            node_options = [(n["node"], n["node"]) for n in self.nodes]
-            node_select = self.query_one("#pve-default-node", Select)
-            node_select.set_options(node_options)
-            if pve.default_node:
-                node_select.value = pve.default_node
-            elif self.nodes:
-                node_select.value = self.nodes[0]["node"]
-
-            # Load storage
-            node = pve.default_node or (self.nodes[0]["node"] if self.nodes else None)
-            if node:
-                self.storages = api.get_storage_list(node)
-                storage_options = [(s["storage"], s["storage"]) for s in self.storages]
-                self.query_one("#pve-default-storage", Select).set_options(storage_options)
-                self.query_one("#pve-template-storage", Select).set_options(storage_options)
-
-                if pve.default_storage:
-                    self.query_one("#pve-default-storage", Select).value = pve.default_storage
-                if pve.template_storage:
-                    self.query_one("#pve-template-storage", Select).value = pve.template_storage
-
-                # Load templates
-                self.load_templates(node, pve.template_storage or "local")
+                    # Load templates
+                    self.load_templates(node, pve.template_storage or "local")
 
         except Exception as e:
             self.show_status(f"Error loading Proxmox data: {e}", "warning")
@@ -660,30 +643,29 @@ class SettingsScreen(BaseScreen):
             settings = config_loader.load_settings()
             pve = settings.proxmox
 
-            api = ProxmoxAPI(
+            with ProxmoxAPI(
                 host=pve.host,
                 port=pve.port,
                 user=pve.user,
                 token_name=pve.token_name,
                 token_value=pve.token_value,
                 verify_ssl=pve.verify_ssl,
-            )
-
-            self.templates = api.get_lxc_templates(node, storage)
-            template_options = []
-            for t in self.templates:
-                volid = t.get("volid", "")
-                name = volid.split("/")[-1] if "/" in volid else volid
-                template_options.append((name, volid))
-
-            template_select = self.query_one("#pve-default-template", Select)
-            template_select.set_options(template_options)
-
-            if pve.default_template:
-                for name, volid in template_options:
-                    if pve.default_template in volid:
-                        template_select.value = volid
-                        break
+            ) as api:
+                self.templates = api.get_lxc_templates(node, storage)
+                template_options = []
+                for t in self.templates:
+                    volid = t.get("volid", "")
+                    name = volid.split("/")[-1] if "/" in volid else volid
+                    template_options.append((name, volid))
+
+                template_select = self.query_one("#pve-default-template", Select)
+                template_select.set_options(template_options)
+
+                if pve.default_template:
+                    for name, volid in template_options:
+                        if pve.default_template in volid:
+                            template_select.value = volid
+                            break
 
         except Exception:
             pass
@@ -705,41 +687,40 @@ class SettingsScreen(BaseScreen):
                 result.update("[red]Missing credentials[/red]")
                 return
 
-            api = ProxmoxAPI(
+            with ProxmoxAPI(
                 host=host,
                 port=port,
                 user=user,
                 token_name=token_name,
                 token_value=token_value,
                 verify_ssl=verify_ssl,
-            )
-
-            success, msg = api.test_connection()
-
-            if success:
-                result.update("[green]Connected![/green]")
-                # Load data
-                self.nodes = api.get_nodes()
-                node_options = [(n["node"], n["node"]) for n in self.nodes]
-                node_select = self.query_one("#pve-default-node", Select)
-                node_select.set_options(node_options)
-                if self.nodes:
-                    node_select.value = self.nodes[0]["node"]
-
-                # Load storage
-                node = self.nodes[0]["node"] if self.nodes else None
-                if node:
-                    self.storages = api.get_storage_list(node)
-                    if self.storages:
-                        storage_options = [(s["storage"], s["storage"]) for s in self.storages]
-                        self.query_one("#pve-default-storage", Select).set_options(storage_options)
-                        self.query_one("#pve-template-storage", Select).set_options(storage_options)
-                    else:
-                        self.show_status("No storage found. Token may need Datastore.Audit permission.", "warning")
-
-                self.show_status("Connected to Proxmox!", "success")
-            else:
-                result.update(f"[red]Failed: {msg}[/red]")
+            ) as api:
+                success, msg = api.test_connection()
+
+                if success:
+                    result.update("[green]Connected![/green]")
+                    # Load data
+                    self.nodes = api.get_nodes()
+                    node_options = [(n["node"], n["node"]) for n in self.nodes]
+                    node_select = self.query_one("#pve-default-node", Select)
+                    node_select.set_options(node_options)
+                    if self.nodes:
+                        node_select.value = self.nodes[0]["node"]
+
+                    # Load storage
+                    node = self.nodes[0]["node"] if self.nodes else None
+                    if node:
+                        self.storages = api.get_storage_list(node)
+                        if self.storages:
+                            storage_options = [(s["storage"], s["storage"]) for s in self.storages]
+                            self.query_one("#pve-default-storage", Select).set_options(storage_options)
+                            self.query_one("#pve-template-storage", Select).set_options(storage_options)
+                        else:
+                            self.show_status("No storage found. Token may need Datastore.Audit permission.", "warning")
+
+                    self.show_status("Connected to Proxmox!", "success")
+                else:
+                    result.update(f"[red]Failed: {msg}[/red]")
 
         except Exception as e:
             result.update(f"[red]Error: {e}[/red]")
@@ -807,6 +788,7 @@ class SettingsScreen(BaseScreen):
                     start_on_boot=self.query_one("#lxc-onboot", Checkbox).value,
                     start_after_create=True,
                     features=features,
+                    shared_bootstrap_key=self.query_one("#lxc-shared-key", Checkbox).value,
                 ),
                 opnsense=OPNsenseConfig(
                     enabled=self.query_one("#opnsense-enabled", Checkbox).value,
@@ -820,6 +802,7 @@ class SettingsScreen(BaseScreen):
             )
 
             config_loader.save_settings(settings)
+            get_lxc_manager().invalidate()
             return True
 
         except Exception as e:
@@ -944,20 +927,19 @@ class SettingsScreen(BaseScreen):
                     settings = config_loader.load_settings()
                     pve = settings.proxmox
 
-                    api = ProxmoxAPI(
+                    with ProxmoxAPI(
                         host=pve.host,
                         port=pve.port,
                         user=pve.user,
                         token_name=pve.token_name,
                         token_value=pve.token_value,
                         verify_ssl=pve.verify_ssl,
-                    )
-
-                    self.storages = api.get_storage_list(str(node))
-                    if self.storages:
-                        storage_options = [(s["storage"], s["storage"]) for s in self.storages]
-                        self.query_one("#pve-default-storage", Select).set_options(storage_options)
-                        self.query_one("#pve-template-storage", Select).set_options(storage_options)
+                    ) as api:
+                        self.storages = api.get_storage_list(str(node))
+                        if self.storages:
+                            storage_options = [(s["storage"], s["storage"]) for s in self.storages]
+                            self.query_one("#pve-default-storage", Select).set_options(storage_options)
+                            self.query_one("#pve-template-storage", Select).set_options(storage_options)
                 except Exception:
                     pass
 
@@ -0,0 +1,30 @@
+"""Tests for the configuration models."""
+
+import unittest
+
+from src.core.config_loader import InfraNetworkConfig, VMConfig
+
+
+class VMConfigEqualityTest(unittest.TestCase):
+    """Cached lookups must not make equal configs compare unequal."""
+
+    def test_equal_after_ssh_key_path_read(self):
+        a = VMConfig(name="web1", host="10.0.0.5", ssh_key="~/.ssh/id_ed25519")
+        b = VMConfig(name="web1", host="10.0.0.5", ssh_key="~/.ssh/id_ed25519")
+        a.ssh_key_path  # Only one side has been read
+        self.assertEqual(a, b)
+
+    def test_ssh_key_path_follows_key_changes(self):
+        vm = VMConfig(name="web1", host="10.0.0.5", ssh_key="/keys/a")
+        vm.ssh_key_path
+        vm.ssh_key = "/keys/b"
+        self.assertEqual(str(vm.ssh_key_path), "/keys/b")
+
+    def test_network_equal_after_get_network(self):
+        a, b = InfraNetworkConfig(), InfraNetworkConfig()
+        a.get_network()
+        self.assertEqual(a, b)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+"""Tests for the batched VM setup script."""
+
+import subprocess
+import unittest
+
+from src.core.ssh_manager import STEP_MARKER, _build_step_script, _LineWriter
+
+
+class StepScriptTest(unittest.TestCase):
+    """Step markers must always start a line of their own."""
+
+    def run_script(self, commands: list[str]) -> tuple[list[str], int]:
+        result = subprocess.run(
+            ["bash", "-c", _build_step_script(commands)],
+            capture_output=True, text=True
+        )
+        lines: list[str] = []
+        writer = _LineWriter(lines.append)
+        writer.write(result.stdout)
+        writer.flush_line()
+        return lines, result.returncode
+
+    def test_marker_after_output_without_trailing_newline(self):
+        lines, code = self.run_script(["printf 'no newline'", "echo done"])
+        markers = [line for line in lines if line.startswith(STEP_MARKER)]
+        self.assertEqual(markers, [f"{STEP_MARKER}0", f"{STEP_MARKER}1"])
+        self.assertIn("no newline", lines)
+        self.assertEqual(code, 0)
+
+    def test_failing_step_stops_the_script(self):
+        lines, code = self.run_script(["printf partial; exit 3", "echo never"])
+        self.assertEqual(code, 3)
+        self.assertNotIn(f"{STEP_MARKER}1", lines)
+        self.assertNotIn("never", lines)
+
+
+if __name__ == "__main__":
+    unittest.main()